@@ -0,0 +1,62 @@
+from bisect import bisect_right
+
+
+# ===============================
+# IN-MEMORY ALERT BOOK
+# ===============================
+class AlertBook:
+
+    # alerts fire once price >= target, so per symbol they are kept
+    # sorted by target and a move is resolved with a single bisect
+
+    def __init__(self):
+        self._targets = {}
+        self._entries = {}
+        # highest id seen, so rows added by other replicas load on their own
+        self.last_id = 0
+
+    def add(self, alert_id, chat_id, symbol, target_price):
+        entry = (target_price, alert_id, chat_id)
+        entries = self._entries.setdefault(symbol, [])
+        targets = self._targets.setdefault(symbol, [])
+
+        pos = bisect_right(entries, entry)
+        entries.insert(pos, entry)
+        targets.insert(pos, target_price)
+        self.last_id = max(self.last_id, alert_id)
+
+    def load(self, rows):
+        self._targets.clear()
+        self._entries.clear()
+        self.last_id = 0
+
+        count = 0
+        for alert_id, chat_id, symbol, target_price in rows:
+            self.add(alert_id, chat_id, symbol, target_price)
+            count += 1
+
+        return count
+
+    def symbols(self):
+        return list(self._entries)
+
+    def pop_crossed(self, symbol, price):
+        targets = self._targets.get(symbol)
+        if not targets:
+            return []
+
+        cut = bisect_right(targets, price)
+        fired = self._entries[symbol][:cut]
+
+        del self._entries[symbol][:cut]
+        del targets[:cut]
+
+        if not targets:
+            del self._targets[symbol]
+            del self._entries[symbol]
+
+        return fired
+
+    def __len__(self):
+        return sum(len(e) for e in self._entries.values())
+
@@ -0,0 +1,377 @@
+import itertools
+import math
+import sys
+import time
+
+import numpy as np
+
+import config
+import market
+from ranking import close_matrix
+
+DEFAULT_PARAMS = {
+    "ema_fast": 20,
+    "ema_slow": 50,
+    "rsi_period": 14,
+    "rsi_buy": 55,
+    "rsi_sell": 45,
+    "cooldown": 600,        # seconds, as strategy.SIGNAL_COOLDOWN
+    "vol_period": 14,
+    "horizon": 20,          # bars a trade may stay open
+}
+
+BAR_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "1d": 86400}
+
+
+# ===============================
+# MARKET DATA
+# ===============================
+class History:
+
+    # aligned (symbols x bars) matrices, right-aligned on the latest bar
+
+    def __init__(self, symbols, closes, highs=None, lows=None, interval="1d", span=None):
+        self.symbols = list(symbols)
+        self.close = close_matrix(closes)
+        self.high = close_matrix(highs) if highs else self.close
+        self.low = close_matrix(lows) if lows else self.close
+        self.interval = interval
+        self.span = span    # (first, last) bar timestamps across symbols
+
+    @classmethod
+    def from_charts(cls, charts, interval="1d"):
+        symbols, closes, highs, lows = [], [], [], []
+        first, last = None, None
+
+        for symbol, result in charts.items():
+            if not result:
+                continue
+            quote = result["indicators"]["quote"][0]
+            timestamps = result.get("timestamp") or [None] * len(quote["close"])
+            rows = [
+                (t, c, h if h is not None else c, l if l is not None else c)
+                for t, c, h, l in zip(timestamps, quote["close"], quote.get("high") or quote["close"], quote.get("low") or quote["close"])
+                if c is not None
+            ]
+            if not rows:
+                continue
+            symbols.append(symbol)
+            closes.append([r[1] for r in rows])
+            highs.append([r[2] for r in rows])
+            lows.append([r[3] for r in rows])
+
+            if rows[0][0] is not None:
+                first = rows[0][0] if first is None else min(first, rows[0][0])
+                last = rows[-1][0] if last is None else max(last, rows[-1][0])
+
+        span = (first, last) if first is not None else None
+        return cls(symbols, closes, highs, lows, interval, span)
+
+
+def load_history(symbols, range=None, interval="1d"):
+    # daily runs replay everything yahoo has; market fetches ranges longer
+    # than the candle store directly, so this is not capped at its 2y
+    range = range or ("max" if interval == "1d" else market.history_range(interval))
+    charts = {s: market.get_chart(s, range=range, interval=interval) for s in symbols}
+    return History.from_charts(charts, interval)
+
+
+def describe_span(history):
+    if not history.span:
+        return "no timestamps"
+
+    first, last = history.span
+    years = (last - first) / (365.25 * 86400)
+    fmt = "%Y-%m-%d"
+    return f"{time.strftime(fmt, time.gmtime(first))} .. {time.strftime(fmt, time.gmtime(last))}, {years:.1f}y"
+
+
+# ===============================
+# INDICATOR PATHS (whole history)
+# ===============================
+def _valid_running(matrix):
+    return np.cumsum(~np.isnan(matrix), axis=1)
+
+
+def ema_path(close, period):
+
+    # recursive along time, vectorized across symbols
+    alpha = 2 / (period + 1)
+    out = np.full(close.shape, np.nan)
+    ema = np.full(close.shape[0], np.nan)
+
+    for col in range(close.shape[1]):
+        x = close[:, col]
+        ema = np.where(np.isnan(ema), x, alpha * x + (1 - alpha) * ema)
+        out[:, col] = ema
+
+    out[_valid_running(close) < period] = np.nan
+    return np.round(out, 2)
+
+
+def _rolling_mean(values, period):
+    # values has leading NaNs only, so a window is valid once it is full
+    filled = np.nan_to_num(values)
+    csum = np.cumsum(filled, axis=1)
+    count = _valid_running(values)
+
+    total = csum.copy()
+    total[:, period:] -= csum[:, :-period]
+
+    valid = count.copy()
+    valid[:, period:] -= count[:, :-period]
+
+    out = total / period
+    out[valid < period] = np.nan
+    return out
+
+
+def _diffs(close):
+    d = np.full(close.shape, np.nan)
+    d[:, 1:] = np.diff(close, axis=1)
+    return d
+
+
+def rsi_path(close, period=14):
+    d = _diffs(close)
+
+    avg_gain = _rolling_mean(np.where(np.isnan(d), np.nan, np.clip(d, 0, None)), period)
+    avg_loss = _rolling_mean(np.where(np.isnan(d), np.nan, np.clip(-d, 0, None)), period)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    rsi = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, rsi)
+    rsi = np.where((avg_loss == 0) & (avg_gain == 0), np.nan, rsi)
+    return np.round(rsi, 2)
+
+
+def volatility_path(close, period=14):
+    return _rolling_mean(np.abs(_diffs(close)), period)
+
+
+# ===============================
+# SIGNALS (strategy.generate_signal rules)
+# ===============================
+def signal_matrix(close, ema_fast, ema_slow, rsi, rsi_buy=55, rsi_sell=45):
+
+    # +1 BUY, -1 SELL, 0 nothing; NaN inputs compare False like a None guard
+    buy = (ema_fast > ema_slow) & (rsi > rsi_buy) & (close > ema_fast)
+    sell = (ema_fast < ema_slow) & (rsi < rsi_sell) & (close < ema_fast)
+
+    return buy.astype(np.int8) - sell.astype(np.int8)
+
+
+def apply_cooldown(signals, cooldown_bars):
+
+    # same rule as generate_auto_signal: a repeat of the last sent signal
+    # is dropped until the cooldown has passed, a flip always goes out
+    rows, cols = np.nonzero(signals)
+    if not len(rows):
+        return signals.copy()
+
+    values = signals[rows, cols]
+
+    new_run = np.ones(len(rows), dtype=bool)
+    new_run[1:] = (rows[1:] != rows[:-1]) | (values[1:] != values[:-1])
+    run_id = np.cumsum(new_run) - 1
+
+    emit = new_run.copy()
+
+    if cooldown_bars > 1:
+        keys = run_id.astype(np.int64) * (signals.shape[1] + cooldown_bars + 1) + cols
+        current = np.flatnonzero(new_run)
+
+        while len(current):
+            nxt = np.searchsorted(keys, keys[current] + cooldown_bars)
+            ok = nxt < len(keys)
+            nxt, current = nxt[ok], current[ok]
+            ok = run_id[nxt] == run_id[current]
+            current = nxt[ok]
+            emit[current] = True
+    else:
+        emit[:] = True
+
+    out = np.zeros_like(signals)
+    out[rows[emit], cols[emit]] = values[emit]
+    return out
+
+
+# ===============================
+# TRADE OUTCOMES (indicators.calculate_targets levels)
+# ===============================
+def _first_hit(mask):
+    hit = mask.any(axis=1)
+    first = np.where(hit, mask.argmax(axis=1), np.iinfo(np.int64).max)
+    return first
+
+
+def evaluate_trades(history, emitted, volatility, horizon, rr_safe=1.5, rr_aggressive=2.5):
+
+    rows, cols = np.nonzero((emitted != 0) & ~np.isnan(volatility))
+    side = emitted[rows, cols].astype(np.float64)
+
+    price = history.close[rows, cols]
+    vol = volatility[rows, cols]
+
+    stoploss = np.round(price - side * vol, 2)
+    target1 = np.round(price + side * vol * rr_safe, 2)
+    target2 = np.round(price + side * vol * rr_aggressive, 2)
+
+    # forward windows of the next `horizon` bars for every trade at once
+    steps = np.arange(1, horizon + 1)
+    idx = cols[:, None] + steps[None, :]
+    inside = idx < history.close.shape[1]
+    idx = np.minimum(idx, history.close.shape[1] - 1)
+
+    high = np.where(inside, history.high[rows[:, None], idx], np.nan)
+    low = np.where(inside, history.low[rows[:, None], idx], np.nan)
+    last = np.where(inside, history.close[rows[:, None], idx], np.nan)
+
+    long = side[:, None] > 0
+    hit_t1 = np.where(long, high >= target1[:, None], low <= target1[:, None])
+    hit_t2 = np.where(long, high >= target2[:, None], low <= target2[:, None])
+    hit_sl = np.where(long, low <= stoploss[:, None], high >= stoploss[:, None])
+
+    first_t1, first_t2, first_sl = _first_hit(hit_t1), _first_hit(hit_t2), _first_hit(hit_sl)
+
+    # a bar touching both a target and the stop counts as the stop
+    outcome = np.full(len(rows), "open", dtype=object)
+    outcome[first_t1 < first_sl] = "target1"
+    outcome[first_t2 < first_sl] = "target2"
+    outcome[(first_sl <= first_t1) & (first_sl < np.iinfo(np.int64).max)] = "stoploss"
+
+    # trades still open at the horizon exit on the last close they saw
+    seen = inside.sum(axis=1)
+    exit_open = np.where(seen > 0, last[np.arange(len(rows)), np.maximum(seen - 1, 0)], price)
+
+    exit_price = np.select(
+        [outcome == "target2", outcome == "target1", outcome == "stoploss"],
+        [target2, target1, stoploss],
+        default=exit_open,
+    )
+    returns = side * (exit_price - price) / price
+
+    return {
+        "rows": rows,
+        "cols": cols,
+        "side": side,
+        "price": price,
+        "target1": target1,
+        "target2": target2,
+        "stoploss": stoploss,
+        "outcome": outcome,
+        "returns": returns,
+    }
+
+
+def summarize(trades):
+    outcome = trades["outcome"]
+    total = len(outcome)
+
+    counts = {name: int((outcome == name).sum()) for name in ("target1", "target2", "stoploss", "open")}
+    closed = total - counts["open"]
+    wins = counts["target1"] + counts["target2"]
+
+    return {
+        "trades": total,
+        "buys": int((trades["side"] > 0).sum()),
+        "sells": int((trades["side"] < 0).sum()),
+        **counts,
+        "hit_rate": round(wins / closed, 4) if closed else 0.0,
+        "avg_return_pct": round(float(trades["returns"].mean() * 100), 3) if total else 0.0,
+    }
+
+
+# ===============================
+# BACKTEST + PARAMETER SWEEP
+# ===============================
+class _Paths:
+
+    # indicator paths memoized per period so a sweep computes each once
+
+    def __init__(self, history):
+        self.history = history
+        self._ema = {}
+        self._rsi = {}
+        self._vol = {}
+
+    def ema(self, period):
+        if period not in self._ema:
+            self._ema[period] = ema_path(self.history.close, period)
+        return self._ema[period]
+
+    def rsi(self, period):
+        if period not in self._rsi:
+            self._rsi[period] = rsi_path(self.history.close, period)
+        return self._rsi[period]
+
+    def volatility(self, period):
+        if period not in self._vol:
+            self._vol[period] = volatility_path(self.history.close, period)
+        return self._vol[period]
+
+
+def run(history, params=None, paths=None):
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    paths = paths or _Paths(history)
+
+    signals = signal_matrix(
+        history.close,
+        paths.ema(p["ema_fast"]),
+        paths.ema(p["ema_slow"]),
+        paths.rsi(p["rsi_period"]),
+        p["rsi_buy"],
+        p["rsi_sell"],
+    )
+
+    bar_seconds = BAR_SECONDS.get(history.interval, 86400)
+    emitted = apply_cooldown(signals, math.ceil(p["cooldown"] / bar_seconds))
+
+    trades = evaluate_trades(history, emitted, paths.volatility(p["vol_period"]), p["horizon"])
+    return {"params": p, "summary": summarize(trades), "trades": trades}
+
+
+def sweep(history, grid):
+    keys = list(grid)
+    paths = _Paths(history)
+    results = []
+
+    for values in itertools.product(*(grid[k] for k in keys)):
+        params = dict(zip(keys, values))
+        result = run(history, params, paths)
+        results.append({"params": result["params"], "summary": result["summary"]})
+
+    results.sort(key=lambda r: (r["summary"]["hit_rate"], r["summary"]["avg_return_pct"]), reverse=True)
+    return results
+
+
+def main(argv):
+    interval = argv[1] if len(argv) > 1 else "1d"
+    symbols = sorted({market.normalize_symbol(s) for s in config.WATCHLIST})
+
+    started = time.perf_counter()
+    history = load_history(symbols, interval=interval)
+    print(f"Loaded {len(history.symbols)} symbols x {history.close.shape[1]} bars "
+          f"({describe_span(history)}) in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    result = run(history)
+    print("Default rules:", result["summary"], f"({time.perf_counter() - started:.3f}s)")
+
+    grid = {
+        "ema_fast": [10, 20, 30],
+        "ema_slow": [50, 100],
+        "rsi_buy": [55, 60],
+        "rsi_sell": [40, 45],
+        "cooldown": [600, 86400 * 3],
+    }
+    started = time.perf_counter()
+    results = sweep(history, grid)
+    print(f"Sweep of {len(results)} combinations in {time.perf_counter() - started:.2f}s")
+    for r in results[:5]:
+        print(r["params"], r["summary"])
+
+
+if __name__ == "__main__":
+    main(sys.argv)
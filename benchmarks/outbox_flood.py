@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import sys
+import time
+
+from telegram.error import ChatMigrated, Forbidden, InvalidToken
+
+import config
+from outbox import Outbox, StubBot
+
+DIGEST = "🚨 AUTO SIGNAL 🚨"
+
+
+# ===============================
+# HELPERS
+# ===============================
+def busiest_second(times):
+    # most sends that fall inside any one-second window
+    times = sorted(times)
+    best, start = 0, 0
+    for end, t in enumerate(times):
+        while t - times[start] >= 1:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+def closest_gap(sent):
+    last, gap = {}, None
+    for t, chat_id, _ in sent:
+        if chat_id in last:
+            gap = t - last[chat_id] if gap is None else min(gap, t - last[chat_id])
+        last[chat_id] = t
+    return gap
+
+
+def recorder(results, key):
+    def done(outcome):
+        results[key] = outcome
+    return done
+
+
+# ===============================
+# SCENARIOS
+# ===============================
+async def flood(chats, signals, flood_every, retry_after):
+    # a signal burst to many chats, with the stub answering flood limits
+    bot = StubBot(flood_every=flood_every, retry_after=retry_after)
+    box = Outbox()
+    box.start(bot)
+
+    started = time.monotonic()
+    for chat_id in range(chats):
+        for i in range(signals):
+            box.enqueue(chat_id, f"signal {i}", digest=DIGEST)
+        box.enqueue(chat_id, "alert")
+
+    await box.stop(timeout=600)
+    elapsed = time.monotonic() - started
+
+    failures = []
+    sends = [t for t, _, _ in bot.sent]
+    if len(bot.sent) != chats * 2:
+        failures.append(f"flood: {len(bot.sent)} sends, expected {chats * 2} (digest + alert per chat)")
+    if busiest_second(sends) > config.SEND_GLOBAL_RATE:
+        failures.append(f"flood: {busiest_second(sends)} sends in one second, limit {config.SEND_GLOBAL_RATE}")
+
+    gap = closest_gap(bot.sent)
+    if gap is not None and gap < config.SEND_CHAT_INTERVAL - 0.01:
+        failures.append(f"flood: two sends to one chat {gap:.3f}s apart")
+
+    for raised in bot.floods:
+        early = [t for t in sends if raised < t < raised + retry_after - 0.01]
+        if early:
+            failures.append(f"flood: {len(early)} sends inside a {retry_after}s RetryAfter pause")
+            break
+
+    print(f"flood: {chats * (signals + 1)} messages to {chats} chats -> {len(bot.sent)} sends in {elapsed:.2f}s")
+    print(f"  busiest second {busiest_second(sends)} sends (limit {config.SEND_GLOBAL_RATE}), "
+          f"closest same-chat gap {gap or 0:.2f}s, {len(bot.floods)} RetryAfter pauses")
+    return failures
+
+
+async def errors():
+    # every failure kind costs its own message only; later ones still go out
+    bot = StubBot(errors={
+        1: ChatMigrated(1001),
+        2: Forbidden("bot was blocked by the user"),
+        3: InvalidToken(),
+        4: RuntimeError("unexpected"),
+    })
+    box = Outbox(chat_interval=0)
+    box.start(bot)
+
+    results = {}
+    for chat_id in (1, 2, 3, 4, 5):
+        box.enqueue(chat_id, f"to {chat_id}", on_done=recorder(results, chat_id))
+    await box.stop(timeout=10)
+
+    expected = {1: "sent", 2: "rejected", 3: "telegram", 4: "error", 5: "sent"}
+    delivered = sorted(chat_id for _, chat_id, _ in bot.sent)
+
+    failures = []
+    if results != expected:
+        failures.append(f"errors: callbacks {results}, expected {expected}")
+    if delivered != [5, 1001]:
+        failures.append(f"errors: delivered to {delivered}, expected [5, 1001]")
+
+    print(f"errors: delivered to {delivered}, callbacks {results}")
+    return failures
+
+
+async def overflow_and_shutdown():
+    # dropped messages report back, both on overflow and on a stop timeout
+    bot = StubBot(latency=0.05)
+    box = Outbox(chat_interval=1)
+
+    results = {}
+    for i in range(config.OUTBOX_CHAT_LIMIT + 5):
+        box.enqueue(7, f"message {i}", on_done=recorder(results, i))
+
+    box.start(bot)
+    await box.stop(timeout=0.5)
+
+    overflowed = [i for i in range(5) if results.get(i) == "overflow"]
+    unsent = sum(1 for outcome in results.values() if outcome == "shutdown")
+    reported = len(results)
+
+    failures = []
+    if len(overflowed) != 5:
+        failures.append(f"overflow: {len(overflowed)} of 5 dropped messages reported")
+    if reported != config.OUTBOX_CHAT_LIMIT + 5:
+        failures.append(f"shutdown: {reported} of {config.OUTBOX_CHAT_LIMIT + 5} messages reported")
+
+    print(f"overflow: {len(overflowed)} dropped, shutdown: {len(bot.sent)} sent, {unsent} reported unsent")
+    return failures
+
+
+async def run(args):
+    failures = []
+    failures += await flood(args.chats, args.signals, args.flood_every, args.retry_after)
+    failures += await errors()
+    failures += await overflow_and_shutdown()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="outbox rate limits, digests and failure handling against a stub bot")
+    parser.add_argument("--chats", type=int, default=80)
+    parser.add_argument("--signals", type=int, default=3, help="digest messages per chat")
+    parser.add_argument("--flood-every", type=int, default=40, help="stub answers every Nth send with RetryAfter")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    failures = asyncio.run(run(args))
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
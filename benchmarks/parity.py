@@ -0,0 +1,176 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import indicators
+import kernels
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+# ===============================
+# REFERENCE IMPLEMENTATIONS (pandas / plain python)
+# ===============================
+def ref_sma(closes, period):
+    return pd.Series(closes).rolling(window=period).mean().to_numpy()
+
+
+def ref_ema(closes, period):
+    return pd.Series(closes).ewm(span=period, adjust=False).mean().to_numpy()
+
+
+def ref_rsi(closes, period):
+    delta = pd.Series(closes).diff()
+    avg_gain = delta.clip(lower=0).rolling(window=period).mean()
+    avg_loss = (-delta.clip(upper=0)).rolling(window=period).mean()
+    return (100 - (100 / (1 + avg_gain / avg_loss))).to_numpy()
+
+
+def _ref_wilder(values, period, first):
+    out = [np.nan] * len(values)
+    if len(values) < first + period:
+        return np.array(out)
+
+    avg = sum(values[first:first + period]) / period
+    out[first + period - 1] = avg
+    for i in range(first + period, len(values)):
+        avg = (avg * (period - 1) + values[i]) / period
+        out[i] = avg
+    return np.array(out)
+
+
+def ref_rsi_wilder(closes, period):
+    deltas = [np.nan] + [b - a for a, b in zip(closes, closes[1:])]
+    gains = [np.nan] + [max(d, 0.0) for d in deltas[1:]]
+    losses = [np.nan] + [max(-d, 0.0) for d in deltas[1:]]
+
+    avg_gain = _ref_wilder(gains, period, 1)
+    avg_loss = _ref_wilder(losses, period, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def ref_atr(highs, lows, closes, period):
+    tr = [highs[0] - lows[0]]
+    for i in range(1, len(closes)):
+        tr.append(max(highs[i] - lows[i], abs(highs[i] - closes[i - 1]), abs(lows[i] - closes[i - 1])))
+    return _ref_wilder(tr, period, 0)
+
+
+def ref_volatility(closes, period):
+    moves = [abs(closes[i] - closes[i - 1]) for i in range(1, len(closes))]
+    out = [np.nan] * len(closes)
+    for i in range(period, len(closes)):
+        out[i] = sum(moves[i - period:i]) / period
+    return np.array(out)
+
+
+# ===============================
+# SERIES
+# ===============================
+def fixture_series():
+    series = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json.gz"))):
+        with gzip.open(path, "rt") as f:
+            quote = json.load(f)["chart"]["result"][0]["indicators"]["quote"][0]
+
+        rows = [r for r in zip(quote["high"], quote["low"], quote["close"]) if None not in r]
+        name = os.path.basename(path).replace(".json.gz", "")
+        series[name] = tuple(list(col) for col in zip(*rows))
+    return series
+
+
+def random_series(count=200, seed=7):
+    rnd = np.random.default_rng(seed)
+    series = {}
+    for i in range(count):
+        n = int(rnd.integers(1, 600))
+        close = 100 * np.exp(np.cumsum(rnd.normal(0, 0.02, n)))
+        if i % 10 == 0:
+            close = np.round(close)      # flat stretches, zero-loss windows
+        spread = np.abs(rnd.normal(0, 0.01, n)) * close
+        series[f"random{i}"] = ((close + spread).tolist(), (close - spread).tolist(), close.tolist())
+    return series
+
+
+# ===============================
+# CHECKS
+# ===============================
+def same(a, b, tol):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    return a.shape == b.shape and np.allclose(a, b, rtol=tol, atol=tol, equal_nan=True)
+
+
+def check_series(name, highs, lows, closes, tol):
+    failures = []
+
+    def expect(label, got, want):
+        if not same(got, want, tol):
+            failures.append(f"{name}: {label}")
+
+    for period in (2, 5, 14, 20, 50):
+        expect(f"sma{period}", kernels.sma(closes, period), ref_sma(closes, period))
+        expect(f"ema{period}", kernels.ema(closes, period), ref_ema(closes, period))
+        expect(f"rsi{period}", kernels.rsi(closes, period), ref_rsi(closes, period))
+        expect(f"rsi_wilder{period}", kernels.rsi_wilder(closes, period), ref_rsi_wilder(closes, period))
+        expect(f"atr{period}", kernels.atr(highs, lows, closes, period), ref_atr(highs, lows, closes, period))
+        expect(f"volatility{period}", kernels.volatility(closes, period), ref_volatility(closes, period))
+
+    # in place writes give the same result as a fresh output
+    for kernel in (kernels.sma, kernels.ema, kernels.rsi, kernels.rsi_wilder, kernels.volatility):
+        buf = kernels.as_array(closes).copy()
+        kernel(buf, 14, out=buf)
+        expect(f"{kernel.__name__} in place", buf, kernel(closes, 14))
+
+    return failures
+
+
+def check_rounded(name, closes):
+    # the bot's rounded outputs may differ by one cent at half-cent ties
+    mismatches = []
+    calls = [
+        ("sma20", indicators.calculate_sma_from_data, ref_sma, 20),
+        ("ema20", indicators.calculate_ema_from_data, ref_ema, 20),
+        ("ema50", indicators.calculate_ema_from_data, ref_ema, 50),
+        ("rsi14", indicators.calculate_rsi_from_data, ref_rsi, 14),
+    ]
+    for label, fn, ref, period in calls:
+        if len(closes) < period:
+            continue
+        want = ref(closes, period)[-1]
+        got = fn(closes, period)
+        if np.isnan(want):
+            if got is not None:
+                mismatches.append((label, got, None))
+        elif got is None or abs(got - round(float(want), 2)) > 0.011:
+            mismatches.append((label, got, round(float(want), 2)))
+    return [f"{name}: {m[0]} {m[1]} != {m[2]}" for m in mismatches]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="numpy kernels vs the pandas reference")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    parser.add_argument("--random", type=int, default=200, help="number of random series")
+    args = parser.parse_args(argv)
+
+    series = {**fixture_series(), **random_series(args.random)}
+
+    failures = []
+    for name, (highs, lows, closes) in series.items():
+        failures += check_series(name, highs, lows, closes, args.tolerance)
+        failures += check_rounded(name, closes)
+
+    for line in failures:
+        print("FAIL", line)
+    print(f"parity: {len(series)} series, {len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytz
+
+import market
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# (symbol, range, interval) served by the stub
+FIXTURES = [
+    ("SBIN.NS", "6mo", "1d"),
+    ("SBIN.NS", "2y", "1d"),
+    ("SBIN.NS", "10y", "1d"),
+    ("SBIN.NS", "5d", "1m"),
+]
+
+TRADING_DAYS = {"6mo": 125, "2y": 495, "10y": 2470, "5d": 5}
+
+
+def fixture_path(symbol, range, interval):
+    return os.path.join(FIXTURE_DIR, f"{symbol}_{range}_{interval}.json.gz")
+
+
+def load_fixture(symbol, range, interval):
+    with gzip.open(fixture_path(symbol, range, interval), "rt") as f:
+        return json.load(f)
+
+
+def save_fixture(symbol, range, interval, data):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with gzip.open(fixture_path(symbol, range, interval), "wt") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+# ===============================
+# RECORD (live yahoo)
+# ===============================
+def record():
+    for symbol, range, interval in FIXTURES:
+        data = market.fetch_data(market.chart_url(symbol, range, interval))
+        if not data:
+            raise SystemExit(f"could not record {symbol} {range} {interval}")
+        save_fixture(symbol, range, interval, data)
+        print("recorded", symbol, range, interval)
+
+
+# ===============================
+# SYNTHETIC (same shape, no network)
+# ===============================
+def _sessions(days):
+    india = pytz.timezone("Asia/Kolkata")
+    day = datetime(2026, 10, 16, 9, 15, tzinfo=india)
+    out = []
+    while len(out) < days:
+        if day.weekday() < 5:
+            out.append(day)
+        day -= timedelta(days=1)
+    return out[::-1]
+
+
+def range_minutes():
+    return range(0, 375)    # 09:15 to 15:29
+
+
+def synthetic(symbol, range, interval, seed=7):
+    rnd = random.Random(f"{seed}:{symbol}:{range}:{interval}")
+    sessions = _sessions(TRADING_DAYS[range])
+
+    if interval == "1d":
+        stamps = [int(s.timestamp()) for s in sessions]
+        drift, sigma = 0.0004, 0.017
+    else:
+        stamps = [int(s.timestamp()) + 60 * m for s in sessions for m in range_minutes()]
+        drift, sigma = 0.0, 0.0009
+
+    price = 600.0
+    quote = {"open": [], "high": [], "low": [], "close": [], "volume": []}
+    for _ in stamps:
+        open_ = price
+        price *= 1 + rnd.gauss(drift, sigma)
+        high = max(open_, price) * (1 + abs(rnd.gauss(0, sigma / 2)))
+        low = min(open_, price) * (1 - abs(rnd.gauss(0, sigma / 2)))
+
+        # yahoo leaves the odd hole in a series
+        gap = rnd.random() < 0.003
+        quote["open"].append(None if gap else round(open_, 2))
+        quote["high"].append(None if gap else round(high, 2))
+        quote["low"].append(None if gap else round(low, 2))
+        quote["close"].append(None if gap else round(price, 2))
+        quote["volume"].append(None if gap else rnd.randint(10_000, 5_000_000))
+
+    return {"chart": {"result": [{
+        "meta": {
+            "symbol": symbol,
+            "currency": "INR",
+            "exchangeName": "NSI",
+            "dataGranularity": interval,
+            "range": range,
+            "regularMarketPrice": quote["close"][-1],
+            "regularMarketTime": stamps[-1],
+        },
+        "timestamp": stamps,
+        "indicators": {"quote": [quote]},
+    }], "error": None}}
+
+
+if __name__ == "__main__":
+    if "--synthetic" in sys.argv:
+        for fixture in FIXTURES:
+            save_fixture(*fixture, synthetic(*fixture))
+            print("generated", *fixture)
+    else:
+        record()
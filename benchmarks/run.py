@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import config
+
+BENCH_DIR = os.path.dirname(__file__)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCH_DIR, "results.json")
+
+# (label, range, interval) of the recorded series
+SERIES = [
+    ("6mo", "6mo", "1d"),
+    ("2y", "2y", "1d"),
+    ("10y", "10y", "1d"),
+    ("1m", "5d", "1m"),
+]
+
+
+# ===============================
+# TIMING
+# ===============================
+def measure(fn, repeats=7, min_time=0.05):
+
+    # calibrate the loop count so one repeat takes at least min_time
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - started) / number * 1e6)
+
+    return {
+        "median_us": round(statistics.median(runs), 3),
+        "min_us": round(min(runs), 3),
+        "loops": number,
+        "repeats": repeats,
+    }
+
+
+# ===============================
+# REFERENCE (machine speed)
+# ===============================
+# a fixed python + numpy workload timed in the same run. cases are compared
+# as multiples of it, so a slower machine or a noisy neighbour moves the
+# reference and the cases together instead of failing the gate
+_REF_ARRAY = np.linspace(100.0, 200.0, 512)
+_REF_LIST = _REF_ARRAY.tolist()
+
+
+def reference():
+    total = 0.0
+    for x in _REF_LIST:
+        total += x * 1.0001
+    return total + float(np.cumsum(_REF_ARRAY)[-1]) + float(np.diff(_REF_ARRAY).mean())
+
+
+def measure_scaled(fn):
+    # the reference is timed right around each case, so load that comes and
+    # goes during the run hits both sides of the ratio
+    before = measure(reference, repeats=5)["min_us"]
+    result = measure(fn)
+    after = measure(reference, repeats=5)["min_us"]
+
+    result["reference_us"] = min(before, after)
+    result["score"] = round(result["min_us"] / result["reference_us"], 4)
+    return result
+
+
+# ===============================
+# CASES
+# ===============================
+def load_series(base_url):
+    import market
+
+    # straight to the stub, no disk store or cache in the way
+    config.YAHOO_BASE_URL = base_url
+    config.CANDLE_STORE_INTERVALS = ()
+    market.candle_cache.clear()
+
+    charts = {}
+    for label, range, interval in SERIES:
+        chart = market.get_chart("SBIN", range=range, interval=interval)
+        if chart is None:
+            raise SystemExit(f"stub did not serve {label}")
+        charts[label] = chart
+    return charts
+
+
+def cases(charts):
+    import indicators
+    import market
+    import strategy
+    import streaming
+
+    out = {}
+
+    for label, chart in charts.items():
+        closes = market.extract_closes(chart)
+        trend = "Strong Bullish Uptrend"
+        price = closes[-1]
+
+        out[f"ema20/{label}"] = lambda c=closes: indicators.calculate_ema_from_data(c, 20)
+        out[f"ema50/{label}"] = lambda c=closes: indicators.calculate_ema_from_data(c, 50)
+        out[f"rsi14/{label}"] = lambda c=closes: indicators.calculate_rsi_from_data(c, 14)
+        out[f"sma20/{label}"] = lambda c=closes: indicators.calculate_sma_from_data(c, 20)
+        out[f"volatility/{label}"] = lambda c=closes: indicators.calculate_volatility(c)
+        out[f"targets/{label}"] = lambda c=closes, p=price: indicators.calculate_targets(c, trend, p)
+
+        def cold_snapshot(ch=chart):
+            # full warm-up, as on first sight of a symbol
+            strategy._snapshots.clear()
+            streaming.books.clear()
+            return strategy.snapshot_from_chart("SBIN", ch)
+
+        out[f"snapshot_cold/{label}"] = cold_snapshot
+
+        snapshot = cold_snapshot()
+        out[f"identify_trend/{label}"] = lambda s=snapshot: strategy.identify_trend(s)
+        out[f"trend_score/{label}"] = lambda s=snapshot: strategy.calculate_trend_score(s)
+        out[f"generate_signal/{label}"] = lambda s=snapshot: strategy.generate_signal(s)
+        out[f"predict_target/{label}"] = lambda s=snapshot: strategy.predict_target(s)
+
+    return out
+
+
+# ===============================
+# BASELINE CHECK
+# ===============================
+def compare(results, baseline, tolerance):
+    # scores are min_us / reference_us; the minimum over the repeats is the
+    # least disturbed run, the median moves with whatever else the host does
+    regressions = []
+
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("score"):
+            continue
+
+        ratio = result["score"] / base["score"]
+        result["baseline_score"] = base["score"]
+        result["ratio"] = round(ratio, 3)
+
+        if ratio > 1 + tolerance:
+            regressions.append((name, base["score"], result["score"], ratio))
+
+    return regressions
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="indicator and strategy micro-benchmarks")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown vs baseline (0.5 = +50%%)")
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--runs", type=int, default=3, help="passes a new baseline is the median of")
+    parser.add_argument("--confirm", type=int, default=3, help="re-measurements before a slowdown counts")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    from benchmarks import stub_server
+
+    server, base_url = stub_server.start()
+    try:
+        charts = load_series(base_url)
+    finally:
+        server.shutdown()
+
+    selected = {n: fn for n, fn in cases(charts).items() if not args.filter or args.filter in n}
+
+    # a baseline is the per-case median over several runs, so one lucky or
+    # unlucky pass does not become the bar every later run is held to
+    runs = args.runs if args.update_baseline else 1
+    passes = [{name: measure_scaled(fn) for name, fn in selected.items()} for _ in range(runs)]
+    results = {
+        name: sorted((p[name] for p in passes), key=lambda r: r["score"])[runs // 2]
+        for name in selected
+    }
+    for name, result in results.items():
+        print(f"{name:<28} {result['median_us']:>12.2f} us {result['score']:>10.4f} x ref")
+
+    # a new baseline is not compared against the old one, so none of the
+    # old scores or ratios end up in the file
+    baseline = {}
+    if os.path.exists(BASELINE_PATH) and not args.update_baseline:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)["results"]
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    # a real slowdown shows up every time, a noisy pass does not; suspects
+    # are measured again and keep their best score
+    for _ in range(args.confirm if regressions else 0):
+        for name, *_ in regressions:
+            again = measure_scaled(selected[name])
+            if again["score"] < results[name]["score"]:
+                results[name] = again
+        regressions = compare(results, baseline, args.tolerance)
+        if not regressions:
+            break
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "timestamp": int(time.time()),
+            "tolerance": args.tolerance,
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("Baseline updated:", BASELINE_PATH)
+        return 0
+
+    for name, base, now, ratio in regressions:
+        print(f"REGRESSION {name}: {base:.2f} -> {now:.2f} x reference ({ratio:.2f}x)")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
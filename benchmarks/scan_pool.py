@@ -0,0 +1,73 @@
+import argparse
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+
+import config
+import scanner
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "SBIN.NS_2y_1d.json.gz")
+
+
+# ===============================
+# RECORDED UNIVERSE
+# ===============================
+def universe(count, seed=11):
+    # every symbol replays the recorded series with its own drift and scale
+    with gzip.open(FIXTURE, "rt") as f:
+        quote = json.load(f)["chart"]["result"][0]["indicators"]["quote"][0]
+    base = np.array([c for c in quote["close"] if c is not None])
+    returns = np.diff(np.log(base))
+
+    rnd = np.random.default_rng(seed)
+    symbols, histories = [], []
+    for i in range(count):
+        shuffled = rnd.permutation(returns) + rnd.normal(0, 0.001)
+        closes = rnd.uniform(20, 3000) * np.exp(np.concatenate([[0], np.cumsum(shuffled)]))
+        symbols.append(f"SYM{i:04d}")
+        histories.append(np.round(closes, 2).tolist())
+    return symbols, histories
+
+
+def timed(symbols, histories, workers, repeats):
+    best = None
+    rows = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = scanner.rank_universe(symbols, histories, workers=workers)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="process-pool universe scan speedup")
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=config.SCAN_WORKERS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    symbols, histories = universe(args.symbols)
+    print(f"{len(symbols)} symbols x {len(histories[0])} bars, {os.cpu_count()} cpus")
+
+    counts = sorted({1, *[2 ** k for k in range(1, 8) if 2 ** k <= args.max_workers], args.max_workers})
+
+    baseline, expected = timed(symbols, histories, 1, args.repeats)
+    print(f"  workers  1 (in process) {baseline:8.2f}s")
+
+    try:
+        for workers in counts:
+            # first call starts the pool, so it is left out of the timing
+            scanner.rank_universe(symbols[:workers], histories[:workers], workers=workers)
+            elapsed, rows = timed(symbols, histories, workers, args.repeats)
+            same = "ok" if rows == expected else "MISMATCH"
+            print(f"  workers {workers:>2} (pool)       {elapsed:8.2f}s  x{baseline / elapsed:5.2f}  {same}")
+    finally:
+        scanner.close_pool()
+
+
+if __name__ == "__main__":
+    main()
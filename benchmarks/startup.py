@@ -0,0 +1,62 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ===============================
+# IMPORT PROFILE
+# ===============================
+def profile(module="bot"):
+    # one fresh interpreter per run so nothing is already imported
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:  self |  cumulative |   name", indent gives the depth
+        head, cumulative, name = line.split("|")
+        self_us = int(head.split(":")[1])
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, self_us, int(cumulative)))
+
+    return rows
+
+
+def breakdown(runs, top=15):
+    # median cumulative time of each direct import of the entry module
+    totals = [r[-1][3] for r in runs]
+    direct = {}
+    for rows in runs:
+        for name, depth, _, cumulative in rows:
+            if depth == 1:
+                direct.setdefault(name, []).append(cumulative)
+
+    ranked = sorted(((statistics.median(v), k) for k, v in direct.items()), reverse=True)
+    return statistics.median(totals), ranked[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="import-time breakdown of the bot's cold start")
+    parser.add_argument("--module", default="bot")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    runs = [profile(args.module) for _ in range(args.runs)]
+    total, ranked = breakdown(runs, args.top)
+
+    print(f"import {args.module}: {total / 1000:.1f} ms (median of {args.runs})")
+    for cumulative, name in ranked:
+        print(f"  {name:<32} {cumulative / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
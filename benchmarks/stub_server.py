@@ -0,0 +1,49 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.record_fixtures import FIXTURES, load_fixture
+
+
+# ===============================
+# LOCAL YAHOO STUB
+# ===============================
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    fixtures = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        symbol = url.path.rsplit("/", 1)[-1]
+
+        key = (symbol, query.get("range", [""])[0], query.get("interval", [""])[0])
+        body = self.fixtures.get(key)
+
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(host="127.0.0.1", port=0):
+    _Handler.fixtures = {
+        fixture: json.dumps(load_fixture(*fixture)).encode()
+        for fixture in FIXTURES
+    }
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "123:standin"
+SECRET = "standin-secret"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ===============================
+# BOT API STAND-IN
+# ===============================
+class BotAPI:
+
+    # answers the handful of methods the bot calls and records every
+    # sendMessage with the time it arrived
+
+    def __init__(self, send_latency):
+        self.send_latency = send_latency
+        self.calls = []
+        self.sent = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.message_id = 0
+
+    def result(self, method, params):
+        if method == "getMe":
+            return {"id": 123, "is_bot": True, "first_name": "Stand-in", "username": "standin_bot"}
+        if method != "sendMessage":
+            return True
+
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.message_id += 1
+            message_id = self.message_id
+        try:
+            time.sleep(self.send_latency)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        chat_id = int(params["chat_id"])
+        self.sent.setdefault(chat_id, time.perf_counter())
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params.get("text", ""),
+        }
+
+    def serve(self, port):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.rsplit("/", 1)[-1]
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+                if "json" in (self.headers.get("Content-Type") or ""):
+                    params = json.loads(body or "{}")
+                else:
+                    params = dict(parse_qsl(body))
+                api.calls.append(method)
+
+                payload = json.dumps({"ok": True, "result": api.result(method, params)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# ===============================
+# UPDATE DELIVERY
+# ===============================
+def update(update_id, chat_id, text="/ping"):
+    command = text.split()[0]
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
+
+
+def deliver(url, body, secret):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json", "X-Telegram-Bot-Api-Secret-Token": secret},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def wait_for(port, proc, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="webhook mode against a local Bot API stand-in")
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="UPDATE_CONCURRENCY for the bot")
+    parser.add_argument("--senders", type=int, default=32, help="parallel update deliveries")
+    parser.add_argument("--send-latency", type=float, default=0.05, help="seconds per sendMessage")
+    args = parser.parse_args(argv)
+
+    api = BotAPI(args.send_latency)
+    api_port, hook_port = free_port(), free_port()
+    server = api.serve(api_port)
+
+    workdir = tempfile.mkdtemp(prefix="webhook-standin-")
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        BOT_TOKEN=TOKEN,
+        TELEGRAM_API_URL=f"http://127.0.0.1:{api_port}/bot",
+        BOT_MODE="webhook",
+        WEBHOOK_LISTEN="127.0.0.1",
+        WEBHOOK_PORT=str(hook_port),
+        WEBHOOK_URL="https://bot.example.com/telegram",
+        WEBHOOK_SECRET=SECRET,
+        UPDATE_CONCURRENCY=str(args.concurrency),
+        METRICS_PORT="0",
+        RUN_JOBS="0",
+    )
+    log = open(os.path.join(workdir, "bot.log"), "w+")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "bot.py")],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+    failures = []
+    try:
+        if not wait_for(hook_port, proc):
+            failures.append("webhook server did not come up")
+            return failures
+
+        url = f"http://127.0.0.1:{hook_port}/telegram"
+        if "setWebhook" not in api.calls:
+            failures.append("setWebhook was not called")
+
+        status = deliver(url, update(1, 1), "wrong-secret")
+        if status != 403:
+            failures.append(f"bad secret answered {status}, expected 403")
+
+        # warm-up update so handler imports are out of the timing
+        deliver(url, update(2, 2), SECRET)
+        time.sleep(1)
+
+        posted = {}
+
+        def post(i):
+            chat_id = 10_000 + i
+            posted[chat_id] = time.perf_counter()
+            return deliver(url, update(100 + i, chat_id), SECRET)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.senders) as pool:
+            statuses = list(pool.map(post, range(args.updates)))
+
+        deadline = time.time() + 30
+        while time.time() < deadline and sum(c in api.sent for c in posted) < len(posted):
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+        bad = [s for s in statuses if s != 200]
+        if bad:
+            failures.append(f"{len(bad)} deliveries not accepted")
+
+        latency = [api.sent[c] - posted[c] for c in posted if c in api.sent]
+        missing = len(posted) - len(latency)
+        if missing:
+            failures.append(f"{missing} updates got no reply")
+        if api.max_in_flight > args.concurrency:
+            failures.append(f"{api.max_in_flight} replies in flight, limit {args.concurrency}")
+
+        if latency:
+            print(f"{len(latency)} updates in {elapsed:.2f}s ({len(latency) / elapsed:.0f}/s)")
+            print(
+                f"  post -> reply  p50 {percentile(latency, 0.5) * 1000:.1f}ms  "
+                f"p95 {percentile(latency, 0.95) * 1000:.1f}ms  max {max(latency) * 1000:.1f}ms"
+            )
+            print(f"  replies in flight: max {api.max_in_flight} (UPDATE_CONCURRENCY {args.concurrency})")
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            failures.append("bot did not stop on SIGINT")
+        server.shutdown()
+
+        if failures:
+            log.seek(0)
+            print(log.read()[-3000:])
+        log.close()
+
+    return failures
+
+
+if __name__ == "__main__":
+    problems = main()
+    for problem in problems:
+        print("FAIL:", problem)
+    sys.exit(1 if problems else 0)
@@ -1,58 +1,46 @@
-from email.mime import text
-import os
-from turtle import pd
-from datetime import datetime
-import pytz
-from urllib import response
-import requests
-import sqlite3
 import time
+
+STARTED = time.perf_counter()
+
+import asyncio
+import os
 import config
+import lazy
 import market
 import strategy
-from market import get_price, is_market_open
-import pandas as pd
+import scanner
+import ranking
+import alerts
+import watchlists
+import storage
+import metrics
+import scheduler
+import ticks
+import replies
+import warmstate
+import outbox as outbox_module
+from outbox import outbox
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
 import indicators
 
 TOKEN = os.getenv("BOT_TOKEN")
 
-conn = sqlite3.connect("alerts.db", check_same_thread=False)
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS alerts (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    chat_id INTEGER,
-    symbol TEXT,
-    target_price REAL
-)
-""")
-conn.commit()
-
-def fetch_data(url, retries=3):
-    for _ in range(retries):
-        try:
-            response = requests.get(
-                url,
-                headers={"User-Agent": "Mozilla/5.0"},
-                timeout=10
-            )
-
-            if response.status_code != 200:
-                time.sleep(1)
-                continue
-
-            return response.json()
+store = storage.Storage(config.DB_PATH)
+alert_book = alerts.AlertBook()
+# the signal chat keeps the configured watchlist, every other chat uses /watch
+watch_index = watchlists.WatchIndex()
 
-        except Exception:
-            time.sleep(1)
+def split_timeframe(args):
+    # "/rsi SBIN 15m" -> (["SBIN"], "15m"); daily when no timeframe is given
+    if args and args[-1].lower() in config.TIMEFRAMES:
+        return args[:-1], args[-1].lower()
+    return list(args), "1d"
 
-    return None
-
- 
-                        
+def bars_label(period, timeframe):
+    if timeframe == "1d":
+        return f"{period}-day"
+    return f"{period}-bar {timeframe}"
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("""Welcome on this bot created by Harsh Raj Gupta.
@@ -75,10 +63,18 @@ async def help(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/ping - Check if bot is responsive\n"
         "/price SYMBOL - Get current price of a stock\n"
         "/alert SYMBOL TARGET_PRICE - Set price alert\n"
-        "/sma SYMBOL - Get 20-day SMA\n"
-        "/ema SYMBOL [PERIOD] - Get EMA (default 20)\n"
-        "/trend SYMBOL - Identify trend and momentum\n"
-        "/rsi SYMBOL - Get 14-day RSI\n"
+        "/sma SYMBOL [TF] - Get 20-period SMA\n"
+        "/ema SYMBOL [PERIOD] [TF] - Get EMA (default 20)\n"
+        "/trend SYMBOL [TF] - Identify trend and momentum\n"
+        "/rsi SYMBOL [TF] - Get 14-period RSI\n"
+        "/score SYMBOL [TF] - Trend score\n"
+        "/target SYMBOL [TF] - Targets and stoploss\n"
+        "TF is one of 1m, 5m, 15m, 1h, 1d (default 1d)\n"
+        "/scan - Rank your watchlist by trend score\n"
+        "/watch [SYMBOL ...] - Show or add to your watchlist (gets auto signals)\n"
+        "/unwatch SYMBOL ... - Remove from your watchlist\n"
+        "/universe - Rank the full NSE universe (admins only)\n"
+        "/stats - Bot latency and load (admins only)\n"
     )
 
 async def ping(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -90,12 +86,18 @@ async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     symbol = context.args[0].upper()
-    current_price = market.get_price(symbol)
+    text = await replies.cached("price", symbol, "1d", lambda: render_price(symbol))
 
-    if current_price is None:
+    if text is None:
         await update.message.reply_text("Invalid stock symbol ❌")
     else:
-        await update.message.reply_text(f"{symbol} price: ₹{current_price}")
+        await update.message.reply_text(text)
+
+async def render_price(symbol, timeframe="1d"):
+    current_price = await market.get_price_async(symbol)
+    if current_price is None:
+        return None
+    return f"{symbol} price: ₹{current_price}"
 async def alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if len(context.args) != 2:
         await update.message.reply_text("Usage: /alert SYMBOL TARGET_PRICE")
@@ -111,35 +113,56 @@ async def alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     chat_id = update.effective_chat.id
 
-    cursor.execute(
-        "INSERT INTO alerts (chat_id, symbol, target_price) VALUES (?, ?, ?)",
-        (chat_id, symbol, target_price),
-    )
-    conn.commit()
+    alert_id = await store.add_alert(chat_id, symbol, target_price)
+    alert_book.add(alert_id, chat_id, symbol, target_price)
 
     await update.message.reply_text(
         f"Alert set for {symbol} at ₹{target_price}"
     )        
 
-async def check_alerts(context: ContextTypes.DEFAULT_TYPE):
-    cursor.execute("SELECT id, chat_id, symbol, target_price FROM alerts")
-    rows = cursor.fetchall()
+# alerts that are done with (delivered, or refused for good), deleted in
+# one batch at the start of the next check
+finished_alerts = []
+
+def alert_delivered(alert_id, chat_id, symbol, target_price):
+    # the row goes once the message is out or telegram refused it for good
+    # (bot blocked, chat gone); one that could still go out goes back in the
+    # book and fires again on the next tick
+    def done(outcome):
+        if outcome in outbox_module.RETRYABLE:
+            alert_book.add(alert_id, chat_id, symbol, target_price)
+        else:
+            finished_alerts.append(alert_id)
+    return done
+
+async def flush_alerts():
+    ids = finished_alerts[:]
+    del finished_alerts[:]
+
+    try:
+        await store.delete_alerts(ids)
+    except Exception as e:
+        print("Alert delete error:", e)
+        finished_alerts.extend(ids)
+
+@metrics.track_job("check_alerts", config.ALERT_CHECK_INTERVAL)
+async def check_alerts(prices):
+    await flush_alerts()
 
-    for alert_id, chat_id, symbol, target_price in rows:
-        current_price = market.get_price(symbol)
+    for symbol in alert_book.symbols():
+        current_price = prices.get(symbol)
 
         if current_price is None:
             continue
 
-        if current_price >= target_price:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=f"🚨 {symbol} hit ₹{target_price}!\nCurrent: ₹{current_price}"
+        # queued for delivery; the outbox handles rate limits and retries
+        for target_price, alert_id, chat_id in alert_book.pop_crossed(symbol, current_price):
+            outbox.enqueue(
+                chat_id,
+                f"🚨 {symbol} hit ₹{target_price}!\nCurrent: ₹{current_price}",
+                on_done=alert_delivered(alert_id, chat_id, symbol, target_price),
             )
 
-            cursor.execute("DELETE FROM alerts WHERE id = ?", (alert_id,))
-            conn.commit()
-
 async def test(update: Update, context: ContextTypes.DEFAULT_TYPE):
     import pandas as pd
     import numpy as np
@@ -147,83 +170,107 @@ async def test(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("Pandas & Numpy working ✅")
 
 async def sma(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args:
-        await update.message.reply_text("Usage: /sma SYMBOL, e.g. /sma SBIN")
+    args, timeframe = split_timeframe(context.args)
+    if not args:
+        await update.message.reply_text("Usage: /sma SYMBOL [TF], e.g. /sma SBIN 15m")
         return
 
-    symbol = context.args[0].upper()
-    value = indicators.calculate_sma(symbol)
+    symbol = args[0].upper()
+    value = await indicators.calculate_sma_async(symbol, interval=timeframe)
 
     if value is None:
         await update.message.reply_text("Could not calculate SMA ❌")
     else:
-        await update.message.reply_text(f"{symbol} 20-day SMA: ₹{value}")
+        await update.message.reply_text(f"{symbol} {bars_label(20, timeframe)} SMA: ₹{value}")
 
 async def ema(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if len(context.args) < 1:
-        await update.message.reply_text("Usage: /ema SYMBOL PERIOD, e.g. /ema SBIN 20")
+    args, timeframe = split_timeframe(context.args)
+    if len(args) < 1:
+        await update.message.reply_text("Usage: /ema SYMBOL PERIOD [TF], e.g. /ema SBIN 20 1h")
         return
 
-    symbol = context.args[0]
-    period = int(context.args[1]) if len(context.args) > 1 else 20
+    symbol = args[0]
+    period = int(args[1]) if len(args) > 1 else 20
 
-    ema_value = indicators.calculate_ema(symbol, period)
+    ema_value = await indicators.calculate_ema_async(symbol, period, timeframe)
 
     if ema_value is None:
         await update.message.reply_text("Could not calculate EMA ❌")
     else:
-        await update.message.reply_text(f"{symbol.upper()} {period}-day EMA: ₹{ema_value}")
+        await update.message.reply_text(f"{symbol.upper()} {bars_label(period, timeframe)} EMA: ₹{ema_value}")
 
 async def trend(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
-        if not context.args:
-            await update.message.reply_text("Usage: /trend SYMBOL, e.g. /trend SBIN")
+        args, timeframe = split_timeframe(context.args)
+        if not args:
+            await update.message.reply_text("Usage: /trend SYMBOL [TF], e.g. /trend SBIN 1h")
             return
 
-        symbol = context.args[0].upper()
-
-        trend = strategy.identify_trend(symbol)
-        rsi = indicators.calculate_rsi(symbol)
-
-        status = "Neutral"
-
-        if rsi is not None:
-            if "Bullish" in trend and rsi > 50:
-                status = "Trend Confirmed ✅"
-            elif "Bearish" in trend and rsi < 50:
-                status = "Trend Confirmed ✅"
-            else:
-                status = "Weak Trend ⚠️"
+        symbol = args[0].upper()
+        text = await replies.cached("trend", symbol, timeframe, lambda: render_trend(symbol, timeframe))
 
-        await update.message.reply_text(
-            f"{symbol} Trend: {trend}\n"
-            f"RSI: {rsi}\n"
-            f"Status: {status}"
-        )
-
-        if trend is None:
+        if text is None:
             await update.message.reply_text("Could not identify trend ❌")
             return
 
+        await update.message.reply_text(text)
+
     except Exception as e:
         print("TREND ERROR:", e)
         await update.message.reply_text(f"Error: {e}")
 
+async def render_trend(symbol, timeframe="1d"):
+    snapshot = await strategy.build_snapshot_async(symbol, timeframe=timeframe)
+    if snapshot is None:
+        return None
+
+    trend = strategy.identify_trend(snapshot)
+    if trend is None:
+        return None
+
+    rsi = snapshot.rsi
+
+    status = "Neutral"
+
+    if rsi is not None:
+        if "Bullish" in trend and rsi > 50:
+            status = "Trend Confirmed ✅"
+        elif "Bearish" in trend and rsi < 50:
+            status = "Trend Confirmed ✅"
+        else:
+            status = "Weak Trend ⚠️"
+
+    return (
+        f"{symbol} ({timeframe}) Trend: {trend}\n"
+        f"RSI: {rsi}\n"
+        f"Status: {status}"
+    )
+
 async def score(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args:
-        await update.message.reply_text("Usage: /score SYMBOL, e.g. /score SBIN")
+    args, timeframe = split_timeframe(context.args)
+    if not args:
+        await update.message.reply_text("Usage: /score SYMBOL [TF], e.g. /score SBIN")
         return
 
-    symbol = context.args[0].upper()
-    result = strategy.calculate_trend_score(symbol)
+    symbol = args[0].upper()
+    text = await replies.cached("score", symbol, timeframe, lambda: render_score(symbol, timeframe))
 
-    if result is None:
+    if text is None:
         await update.message.reply_text("Could not calculate trend score ❌")
         return
 
-    await update.message.reply_text(
-        f"📊 {symbol} Trend Score\n"
+    await update.message.reply_text(text)
+
+async def render_score(symbol, timeframe="1d"):
+    snapshot = await strategy.build_snapshot_async(symbol, timeframe=timeframe)
+    result = strategy.calculate_trend_score(snapshot)
+
+    if result is None:
+        return None
+
+    return (
+        f"📊 {symbol} Trend Score ({timeframe})\n"
         f"Score: {result.get('score', 'N/A')}/100\n"
         f"Bias: {result.get('bias', 'N/A')}\n"
         f"Momentum: {result.get('momentum', 'N/A')}\n"
@@ -233,53 +280,208 @@ async def score(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def rsi(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not context.args:
-        await update.message.reply_text("Usage: /rsi SYMBOL, e.g. /rsi SBIN")
+    args, timeframe = split_timeframe(context.args)
+    if not args:
+        await update.message.reply_text("Usage: /rsi SYMBOL [TF], e.g. /rsi SBIN 15m")
         return
 
-    symbol = context.args[0]
+    symbol = args[0].upper()
+    text = await replies.cached("rsi", symbol, timeframe, lambda: render_rsi(symbol, timeframe))
 
-    rsi_value = indicators.calculate_rsi(symbol)
-
-    if rsi_value is None:
+    if text is None:
         await update.message.reply_text("Could not calculate RSI ❌")
-    elif isinstance(rsi_value, str):
-        await update.message.reply_text(rsi_value)
     else:
-        await update.message.reply_text(f"{symbol.upper()} 14-day RSI: {rsi_value}") 
+        await update.message.reply_text(text)
+
+async def render_rsi(symbol, timeframe="1d"):
+    rsi_value = await indicators.calculate_rsi_async(symbol, interval=timeframe)
+
+    if rsi_value is None:
+        return None
+    return f"{symbol} {bars_label(14, timeframe)} RSI: {rsi_value}"
+
+async def scan(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # the chat's own watchlist when it has one
+    symbols = scanner.unique_symbols(watch_index.of(update.effective_chat.id) or config.WATCHLIST)
+
+    async def load(symbol):
+        return await market.get_candles_async(symbol)
+
+    report = await scanner.scan(symbols, load)
+    loaded = report["results"]
+
+    rows = ranking.rank_symbols(list(loaded), list(loaded.values()))
+
+    if not rows:
+        await update.message.reply_text("Could not scan the watchlist ❌")
+        return
+
+    await update.message.reply_text(ranking.format_table(rows))
+
+async def universe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_chat.id not in config.ADMIN_CHAT_IDS:
+        await update.message.reply_text("Not allowed ❌")
+        return
+
+    symbols = scanner.load_universe()
+    await update.message.reply_text(f"Scanning {len(symbols)} symbols ⏳")
+
+    async def load(symbol):
+        return await market.get_candles_async(symbol)
+
+    # charts are fetched here, the rules run in the process pool
+    rows, report = await scanner.scan_universe(symbols, load)
 
-async def auto_signal_job(context):
-    await auto_signal_engine(context)
+    if not rows:
+        await update.message.reply_text("Could not scan the universe ❌")
+        return
+
+    buys = sum(1 for r in rows if r["signal"] == "BUY")
+    sells = sum(1 for r in rows if r["signal"] == "SELL")
+
+    await update.message.reply_text(
+        ranking.format_table(rows[:config.UNIVERSE_TOP]) + "\n\n"
+        f"Ranked {len(rows)}/{len(symbols)} | BUY {buys} | SELL {sells} | "
+        f"fetch {report['wall_time']:.1f}s | rules {report['rank_time']:.1f}s"
+    )
 
+async def prewarm_replies(event):
+    # after each refresh, re-render hot commands for the watchlist so user
+    # requests answer from memory; replies whose data did not change are kept
+    renderers = {"price": render_price, "rsi": render_rsi, "trend": render_trend, "score": render_score}
+    await replies.prewarm(scanner.unique_symbols(watch_index.symbols()), renderers, "1d")
+
+@metrics.track_job("save_state", config.STATE_SNAPSHOT_INTERVAL)
+async def save_state(context):
+    # captured on the loop, compressed and fsynced on a worker thread
+    state = warmstate.capture()
+    await asyncio.to_thread(warmstate.write, state)
+
+# replicas with RUN_JOBS=0 still take /alert, /watch and /unwatch; they
+# write to the shared database and the job replica picks the rows up here
+db_version = [None]
+
+async def sync_shared_state():
+    version = await store.data_version()
+    if version == db_version[0]:
+        return
+    db_version[0] = version
 
-async def auto_signal_engine(context):
-    bot = context.bot
+    # only newer ids: a fired alert still in the outbox must not come back
+    for row in await store.load_alerts(after_id=alert_book.last_id):
+        alert_book.add(*row)
+    watch_index.load(await store.load_watchlists())
+
+@metrics.track_job("market_poller", config.ALERT_CHECK_INTERVAL)
+async def market_poller(context):
+    # the only job that prices symbols; consumers read from the tick bus.
+    # the return value lets the scheduler back off while prices are flat
+    try:
+        await sync_shared_state()
+    except Exception as e:
+        print("Shared state reload error:", e)
+    await ticks.bus.poll()
+    return ticks.bus.changed
+
+
+@metrics.track_job("auto_signal_engine", config.SIGNAL_SCAN_INTERVAL)
+async def auto_signal_engine(prices):
 
     if not market.is_market_open():
         print("Market is closed. Skipping signal generation.")
         return
 
-    for symbol in config.WATCHLIST:
+    # every watched symbol is evaluated once, however many chats watch it
+    symbols = scanner.unique_symbols(watch_index.symbols())
 
-        if not strategy.can_send_signal(symbol):
-            continue
+    async def evaluate(symbol):
+        signals = []
 
-        result = strategy.generate_auto_signal(symbol)
+        for timeframe in config.SIGNAL_TIMEFRAMES:
+            key = symbol if timeframe == "1d" else f"{symbol}:{timeframe}"
+            if not strategy.can_send_signal(key):
+                continue
 
-        if result is None:
-            continue
+            snapshot = await strategy.build_snapshot_async(symbol, prices.get(symbol), timeframe)
+            if snapshot is None:
+                continue
+
+            result = strategy.generate_auto_signal(snapshot)
+            if result:
+                signals.append(result)
+
+        return signals or None
+
+    report = await scanner.scan(symbols, evaluate)
+
+    for result in [r for signals in report["results"].values() for r in signals]:
 
         msg = (
-            f"🚨 AUTO SIGNAL 🚨\n"
-            f"{result['symbol']} → {result['signal']}\n"
+            f"{result['symbol']} ({result['timeframe']}) → {result['signal']}\n"
             f"Price: ₹{result['price']}\n"
             f"Trend: {result['trend']}\n"
-            f"Score: {result['score']}/100\n"
+            f"Score: {result['score']['score']}/100\n"
             f"RSI: {result['rsi']}"
         )
 
-        # replace CHAT_ID with yours
-        await bot.send_message(chat_id=7894459956, text=msg)
+        # rendered once, then fanned out; a burst goes out as one digest per chat
+        for chat_id in watch_index.subscribers(result["symbol"]):
+            outbox.enqueue(chat_id, msg, digest="🚨 AUTO SIGNAL 🚨")
+
+async def watch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+
+    if not context.args:
+        symbols = watch_index.of(chat_id)
+        if not symbols:
+            await update.message.reply_text("Usage: /watch SYMBOL [SYMBOL ...], e.g. /watch SBIN TCS")
+        else:
+            await update.message.reply_text("👀 Watching: " + ", ".join(symbols))
+        return
+
+    wanted = [watchlists.display_symbol(s) for s in context.args]
+    room = config.WATCHLIST_LIMIT - len(watch_index.of(chat_id))
+    new = [s for s in dict.fromkeys(wanted) if s not in watch_index.of(chat_id)]
+
+    if len(new) > room:
+        await update.message.reply_text(f"Watchlist limit is {config.WATCHLIST_LIMIT} symbols ❌")
+        return
+
+    # every watched symbol is polled, scanned and prewarmed from now on, so
+    # only ones with a live quote get in
+    prices = await market.get_prices_async(new) if new else {}
+    unknown = [s for s in new if prices.get(s) is None]
+    new = [s for s in new if prices.get(s) is not None]
+
+    if new:
+        await store.add_watch(chat_id, new)
+        watch_index.add(chat_id, new)
+
+    lines = []
+    if unknown:
+        lines.append("No price found for: " + ", ".join(unknown) + " ❌")
+    if watch_index.of(chat_id):
+        lines.append("👀 Watching: " + ", ".join(watch_index.of(chat_id)))
+    await update.message.reply_text("\n".join(lines) or "Watchlist is empty")
+
+async def unwatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+
+    if not context.args:
+        await update.message.reply_text("Usage: /unwatch SYMBOL [SYMBOL ...]")
+        return
+
+    removed = watch_index.remove(chat_id, context.args)
+    await store.remove_watch(chat_id, removed)
+
+    if not removed:
+        await update.message.reply_text("Not on your watchlist ❌")
+        return
+
+    left = watch_index.of(chat_id)
+    await update.message.reply_text(
+        f"Removed {', '.join(removed)}\n" + ("👀 Watching: " + ", ".join(left) if left else "Watchlist is empty")
+    )
 
 async def id(update, context):
     await update.message.reply_text(str(update.effective_chat.id)) 
@@ -287,13 +489,15 @@ async def id(update, context):
 
 async def target_command(update, context):
 
-    if not context.args:
-        await update.message.reply_text("Usage: /target SBIN")
+    args, timeframe = split_timeframe(context.args)
+    if not args:
+        await update.message.reply_text("Usage: /target SBIN [TF]")
         return
 
-    symbol = context.args[0]
+    symbol = args[0]
 
-    data = strategy.predict_target(symbol)
+    snapshot = await strategy.build_snapshot_async(symbol, timeframe=timeframe)
+    data = strategy.predict_target(snapshot)
 
     if not data:
         await update.message.reply_text("Could not calculate target ❌")
@@ -301,7 +505,7 @@ async def target_command(update, context):
 
     msg = (
         f"🎯 TARGET ANALYSIS\n"
-        f"{symbol.upper()}\n\n"
+        f"{symbol.upper()} ({timeframe})\n\n"
         f"Price: ₹{data['price']}\n"
         f"Trend: {data['trend']}\n"
         f"Target 1: ₹{data['target1']}\n"
@@ -311,35 +515,125 @@ async def target_command(update, context):
 
     await update.message.reply_text(msg)             
 
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_chat.id not in config.ADMIN_CHAT_IDS:
+        await update.message.reply_text("Not allowed ❌")
+        return
+
+    await update.message.reply_text(metrics.summary() + "\n\n" + scheduler.describe())
+
+def add_command(app, name, handler):
+    app.add_handler(CommandHandler(name, metrics.track_command(name, handler)))
+
+async def on_startup(app):
+    print("Alerts loaded:", alert_book.load(await store.load_alerts()))
+
+    alert_feed = ticks.bus.subscribe("alerts", ("tick",), alert_book.symbols)
+    # first start only: the default watchlist becomes the signal chat's rows
+    defaults = list(dict.fromkeys(watchlists.display_symbol(s) for s in config.WATCHLIST))
+    seeded = await store.seed_watch(config.SIGNAL_CHAT_ID, defaults)
+    if seeded:
+        print("Default watchlist seeded:", seeded)
+    print("Watchlist entries loaded:", watch_index.load(await store.load_watchlists()))
+
+    signal_feed = ticks.bus.subscribe("signals", ("bar",), watch_index.symbols)
+
+    ticks.bus.consume(alert_feed, lambda event: check_alerts(event["prices"]))
+    ticks.bus.consume(signal_feed, lambda event: auto_signal_engine(event["prices"]))
+
+    # only the latest refresh is worth warming for
+    warm_feed = ticks.bus.subscribe("prewarm", ("tick",), watch_index.symbols, maxsize=1)
+    ticks.bus.consume(warm_feed, prewarm_replies)
+
+    outbox.start(app.bot)
+
+async def on_stop(app):
+    # the bot is still connected here, so queued messages can drain
+    await ticks.bus.stop()
+    await outbox.stop()
+    await flush_alerts()
+    warmstate.write(warmstate.capture())
+
+async def on_shutdown(app):
+    scanner.close_pool()
+    await market.close_http()
+    store.close()
+
 def main():
     if not TOKEN:
         raise ValueError("BOT_TOKEN is not set")
-    
-    app = ApplicationBuilder().token(TOKEN).build()
-
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("help", help))
-    app.add_handler(CommandHandler("ping", ping))
-    app.add_handler(CommandHandler("price", price))
-    app.add_handler(CommandHandler("alert", alert))
-    app.add_handler(CommandHandler("test", test))
-    app.add_handler(CommandHandler("sma", sma))
-    app.add_handler(CommandHandler("ema", ema))
-    app.add_handler(CommandHandler("trend", trend))
-    app.add_handler(CommandHandler("rsi", rsi))
-    app.add_handler(CommandHandler("score", score))
-    app.add_handler(CommandHandler("id", id))
-    app.add_handler(CommandHandler("target", target_command))
-
-    print("AutoSignal Engine Running...")
-    # Schedule the alert checking function to run every 1 minutes
-    app.job_queue.run_repeating(check_alerts, interval=60, first=10)
-    app.job_queue.run_repeating(auto_signal_job, interval=300, first=10)  # Run every 5 minutes  
-    job_queue = app.job_queue
-    job_queue.run_repeating(auto_signal_job, interval=300)
-    job_queue = app.job_queue 
+
+    # schema setup runs once here, on the storage writer thread
+    store.open()
+
+    # cooldowns, indicator books and quotes from before the restart
+    warmstate.load()
+
+    if config.BOT_MODE == "webhook":
+        if not config.WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL is not set")
+        if not config.WEBHOOK_SECRET:
+            raise ValueError("WEBHOOK_SECRET is not set")
+
+    builder = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        # updates are handled side by side instead of one after another
+        .concurrent_updates(config.UPDATE_CONCURRENCY)
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+    )
+    if config.TELEGRAM_API_URL:
+        builder.base_url(config.TELEGRAM_API_URL)
+    app = builder.build()
+
+    add_command(app, "start", start)
+    add_command(app, "help", help)
+    add_command(app, "ping", ping)
+    add_command(app, "price", price)
+    add_command(app, "alert", alert)
+    add_command(app, "test", test)
+    add_command(app, "sma", sma)
+    add_command(app, "ema", ema)
+    add_command(app, "trend", trend)
+    add_command(app, "rsi", rsi)
+    add_command(app, "score", score)
+    add_command(app, "scan", scan)
+    add_command(app, "watch", watch)
+    add_command(app, "unwatch", unwatch)
+    add_command(app, "universe", universe)
+    add_command(app, "id", id)
+    add_command(app, "target", target_command)
+    add_command(app, "stats", stats)
+
+    if config.METRICS_PORT:
+        metrics.serve(config.METRICS_HOST, config.METRICS_PORT)
+
+    # behind a load balancer every replica answers commands, but only one
+    # may poll prices and send signals or they go out once per replica;
+    # all of them share DB_PATH so that one sees every alert and watchlist
+    if config.RUN_JOBS:
+        print("AutoSignal Engine Running...")
+        # one poller feeds both the alert checker and the signal engine; it only
+        # runs during NSE sessions and re-arms itself with an adaptive interval
+        scheduler.arm(app.job_queue, "market_poller", market_poller, config.ALERT_CHECK_INTERVAL, first=10)
+        app.job_queue.run_repeating(save_state, interval=config.STATE_SNAPSHOT_INTERVAL, name="save_state")
     print("Bot running...")
-    app.run_polling()
+    print(f"Startup: ready in {time.perf_counter() - STARTED:.2f}s | {lazy.report()}")
+
+    if config.BOT_MODE == "webhook":
+        print(f"Webhook: listening on {config.WEBHOOK_LISTEN}:{config.WEBHOOK_PORT}/{config.WEBHOOK_PATH}")
+        app.run_webhook(
+            listen=config.WEBHOOK_LISTEN,
+            port=config.WEBHOOK_PORT,
+            url_path=config.WEBHOOK_PATH,
+            webhook_url=config.WEBHOOK_URL,
+            secret_token=config.WEBHOOK_SECRET,
+            max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+        )
+    else:
+        app.run_polling()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# =========================
+# TTL + LRU CACHE
+# =========================
+class TTLCache:
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at <= now:
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        return self.lookup((key,), default)
+
+    def lookup(self, keys, default=None, count_miss=True):
+        # first live key wins, counted as a single hit or miss. callers that
+        # fall through to another cached lookup pass count_miss=False so one
+        # fetch is not counted as two misses
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._live(key, now)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[0]
+            if count_miss:
+                self.misses += 1
+            return default
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def entries(self):
+        # live (key, value, expires_at) triples, oldest first, for snapshots
+        now = time.time()
+        with self._lock:
+            return [(k, v, exp) for k, (v, exp) in self._data.items() if exp > now]
+
+    def restore(self, entries):
+        now = time.time()
+        count = 0
+        for key, value, expires_at in entries:
+            if expires_at > now:
+                self.set(key, value, expires_at - now)
+                count += 1
+        return count
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
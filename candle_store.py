@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import config
+
+BAR_DTYPE = np.dtype([
+    ("t", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+EMPTY = np.zeros(0, dtype=BAR_DTYPE)
+
+# yahoo range -> days of history
+RANGE_DAYS = {
+    "1d": 1, "5d": 5, "7d": 7, "1mo": 31, "3mo": 92, "6mo": 183,
+    "60d": 60, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653,
+}
+
+IST_OFFSET = 19800  # seconds east of UTC
+SESSION_OPEN = 9 * 3600 + 15 * 60   # 09:15 IST, seconds into the day
+
+TIMEFRAME_MINUTES = {"1m": 1, "5m": 5, "15m": 15, "1h": 60}
+
+_lock = threading.Lock()
+_fresh_until = {}
+_refetch = set()    # (symbol, interval) whose last delta failed
+
+
+# ===============================
+# FILES
+# ===============================
+def path_for(symbol, interval):
+    return os.path.join(config.CANDLE_STORE_DIR, f"{symbol}_{interval}.npy")
+
+
+def load(symbol, interval):
+    path = path_for(symbol, interval)
+    if not os.path.exists(path):
+        return EMPTY
+
+    try:
+        return np.load(path, mmap_mode="r")
+    except Exception as e:
+        print("Candle store read error:", e)
+        return EMPTY
+
+
+def save(symbol, interval, bars):
+    os.makedirs(config.CANDLE_STORE_DIR, exist_ok=True)
+    path = path_for(symbol, interval)
+    tmp = path + ".tmp"
+
+    # write aside then swap, readers never see a half-written file
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+    os.replace(tmp, path)
+
+
+# ===============================
+# YAHOO <-> BARS
+# ===============================
+def _column(quote, field, n):
+    values = quote.get(field) or [None] * n
+    return np.array([np.nan if v is None else v for v in values[:n]], dtype=np.float64)
+
+
+def bars_from_chart(result):
+    timestamps = result.get("timestamp") or []
+    quote = result["indicators"]["quote"][0]
+    n = len(timestamps)
+
+    bars = np.zeros(n, dtype=BAR_DTYPE)
+    bars["t"] = timestamps
+    for field in ("open", "high", "low", "close", "volume"):
+        bars[field] = _column(quote, field, n)
+
+    bars = bars[~np.isnan(bars["close"])]
+
+    # gaps in o/h/l fall back to the close, missing volume to zero
+    for field in ("open", "high", "low"):
+        missing = np.isnan(bars[field])
+        bars[field][missing] = bars["close"][missing]
+    bars["volume"][np.isnan(bars["volume"])] = 0.0
+
+    return bars
+
+
+def chart_from_bars(symbol, bars):
+    return {
+        "meta": {
+            "symbol": symbol,
+            "regularMarketTime": int(bars["t"][-1]) if len(bars) else None,
+        },
+        "timestamp": bars["t"].tolist(),
+        "indicators": {"quote": [{
+            "open": bars["open"].tolist(),
+            "high": bars["high"].tolist(),
+            "low": bars["low"].tolist(),
+            "close": bars["close"].tolist(),
+            "volume": bars["volume"].tolist(),
+        }]},
+    }
+
+
+# ===============================
+# DELTA REFRESH
+# ===============================
+def _bar_key(t, interval):
+    # daily bars are matched by IST trading date, intraday by timestamp
+    if interval == "1d":
+        return (t + IST_OFFSET) // 86400
+    return t
+
+
+def merge(stored, fresh, interval):
+    if not len(fresh):
+        return stored
+    if not len(stored):
+        return fresh
+
+    first = _bar_key(fresh["t"][0], interval)
+    keep = stored[_bar_key(stored["t"], interval) < first]
+    return np.concatenate([keep, fresh])
+
+
+def needs_full(symbol, interval, bars):
+    # the whole history again when nothing is stored, the last delta failed,
+    # or the gap since the last bar is wider than yahoo serves for the feed
+    # (about a week of 1m bars, 60 days of 5m), where a delta never succeeds
+    if not len(bars) or (symbol, interval) in _refetch:
+        return True
+
+    days = RANGE_DAYS.get(config.CANDLE_STORE_HISTORY.get(interval))
+    return interval != "1d" and days is not None and bars["t"][-1] < time.time() - days * 86400
+
+
+def delta_url(symbol, interval, bars, full=False):
+    # whole history on first sight, otherwise from the last stored bar on
+    if full or not len(bars):
+        history = config.CANDLE_STORE_HISTORY.get(interval, "2y")
+        return f"{config.YAHOO_BASE_URL}/v8/finance/chart/{symbol}?range={history}&interval={interval}"
+
+    start = int(bars["t"][-1])
+    end = int(time.time()) + 86400
+    return f"{config.YAHOO_BASE_URL}/v8/finance/chart/{symbol}?period1={start}&period2={end}&interval={interval}"
+
+
+def is_fresh(symbol, interval):
+    return _fresh_until.get((symbol, interval), 0) > time.time()
+
+
+def apply_delta(symbol, interval, data, ttl, full=False):
+    stored = load(symbol, interval)
+
+    result = (data or {}).get("chart", {}).get("result")
+    if not result:
+        # keep serving what we have, and start over from a full download
+        # next time rather than retrying the same delta forever
+        _refetch.add((symbol, interval))
+        return stored if len(stored) else None
+
+    with _lock:
+        fresh = bars_from_chart(result[0])
+
+        # a full download replaces the stored file instead of extending it
+        bars = fresh if full else merge(np.asarray(stored), fresh, interval)
+        _refetch.discard((symbol, interval))
+
+        # intraday history is only kept as far back as it is downloaded
+        if interval != "1d":
+            days = RANGE_DAYS.get(config.CANDLE_STORE_HISTORY.get(interval))
+            if days:
+                bars = bars[bars["t"] >= time.time() - days * 86400]
+
+        save(symbol, interval, bars)
+        _fresh_until[(symbol, interval)] = time.time() + ttl
+
+    return load(symbol, interval)
+
+
+def covers(interval, range):
+    # whether the stored history reaches back far enough to serve a range;
+    # longer ones ("5y", "10y", "max") are fetched directly instead
+    days = RANGE_DAYS.get(range)
+    stored = RANGE_DAYS.get(config.CANDLE_STORE_HISTORY.get(interval))
+    return days is not None and stored is not None and days <= stored
+
+
+def window(bars, range):
+    if bars is None or not len(bars):
+        return bars
+
+    # never hand out the stored history in place of a longer range
+    days = RANGE_DAYS.get(range)
+    if days is None:
+        return None
+    if days == 1:
+        return bars[-1:]
+
+    cutoff = time.time() - days * 86400
+    return bars[bars["t"] >= cutoff]
+
+
+# ===============================
+# RESAMPLING (session aligned)
+# ===============================
+def resample(bars, minutes):
+    if bars is None or not len(bars):
+        return bars
+
+    # buckets start at 09:15 IST, so 1h bars are 09:15, 10:15, ... like NSE
+    local = bars["t"] + IST_OFFSET
+    day = local // 86400
+    slot = (local % 86400 - SESSION_OPEN) // (minutes * 60)
+
+    bucket = day * 10000 + slot
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:] - 1, len(bars) - 1]
+
+    out = np.zeros(len(starts), dtype=BAR_DTYPE)
+    out["t"] = day[starts] * 86400 + SESSION_OPEN + slot[starts] * minutes * 60 - IST_OFFSET
+    out["open"] = bars["open"][starts]
+    out["high"] = np.maximum.reduceat(bars["high"], starts)
+    out["low"] = np.minimum.reduceat(bars["low"], starts)
+    out["close"] = bars["close"][ends]
+    out["volume"] = np.add.reduceat(bars["volume"], starts)
+
+    return out
@@ -1,3 +1,5 @@
+import os
+
 WATCHLIST = [
     "RELIANCE","TCS","INFY","HINDUNILVR","ICICIBANK","HDFC","LT","BAJAJFINSV",
     "WIPRO","ASIANPAINT","MARUTI","SBIN","AXISBANK","ITC",
@@ -16,4 +18,90 @@ WATCHLIST = [
 ]
 
 CHAT_ID = "7894459956"
-SIGNAL_INTERVAL = 1200  # 20 minutes in seconds
\ No newline at end of file
+SIGNAL_INTERVAL = 1200  # 20 minutes in seconds
+
+# candle cache
+CANDLE_CACHE_TTL = 60       # seconds while the market is open
+CANDLE_CACHE_SIZE = 512     # max cached (symbol, range, interval) charts
+REPLY_CACHE_SIZE = 2048     # rendered command replies
+
+# upstream http
+HTTP_TIMEOUT = 10           # seconds per request
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_MAX_CONNECTIONS = 20   # pooled connections, all hosts
+HTTP_MAX_KEEPALIVE = 10
+HTTP_PER_HOST_LIMIT = 8     # concurrent requests per host
+
+# batched quotes
+QUOTE_BATCH_SIZE = 20       # symbols per spark request (provider limit)
+
+# watchlist scanner
+SIGNAL_CHAT_ID = int(os.getenv("SIGNAL_CHAT_ID", "7894459956"))   # its watchlist starts as WATCHLIST
+WATCHLIST_LIMIT = 50        # symbols one chat may /watch
+SCAN_CONCURRENCY = 16       # symbols evaluated at once
+SCAN_WORKERS = os.cpu_count() or 1   # processes for full-universe scans
+SCAN_SHARDS_PER_WORKER = 4
+UNIVERSE_FILE = os.getenv("UNIVERSE_FILE", "universe.txt")   # one NSE symbol per line
+UNIVERSE_TOP = 20            # rows shown by /universe
+
+# warm restart snapshot (signal cooldowns, indicator books, quotes)
+STATE_PATH = "state.json.gz"
+STATE_SNAPSHOT_INTERVAL = 60   # seconds
+
+# storage
+DB_PATH = os.getenv("DB_PATH", "alerts.db")   # replicas share one file; the RUN_JOBS one reloads it
+
+# on-disk candle store
+CANDLE_STORE_DIR = "candles"
+CANDLE_STORE_INTERVALS = ("1d", "5m", "1m")
+CANDLE_STORE_HISTORY = {"1d": "2y", "5m": "60d", "1m": "7d"}     # first download per symbol
+
+# upstream base url, pointed at a local stub for benchmarks
+YAHOO_BASE_URL = os.getenv("YAHOO_BASE_URL", "https://query1.finance.yahoo.com")
+
+# job intervals (seconds)
+ALERT_CHECK_INTERVAL = 60     # market poller tick, feeds alerts
+SIGNAL_SCAN_INTERVAL = 300    # signal bar length, feeds the signal engine
+
+# adaptive poller: fast near the open and close, backing off while prices are flat
+POLL_FAST_INTERVAL = 15       # seconds, within SESSION_EDGE of the open or close
+POLL_MAX_INTERVAL = 240       # seconds, ceiling for the back-off
+SESSION_EDGE = 15 * 60        # seconds after the open / before the close polled fast
+
+# tick bus, events queued per consumer before the oldest is dropped
+BUS_QUEUE_SIZE = 8
+
+# outbound telegram sends
+SEND_GLOBAL_RATE = 25       # messages per second across all chats (telegram allows ~30)
+SEND_CHAT_INTERVAL = 1.0    # seconds between messages to the same chat
+SEND_RETRIES = 3            # network failures retried before a message is dropped
+DIGEST_MAX = 20             # signals coalesced into one message per chat
+OUTBOX_CHAT_LIMIT = 200     # queued messages per chat before the oldest is dropped
+
+# metrics
+ADMIN_CHAT_IDS = {int(i) for i in os.getenv("ADMIN_CHAT_IDS", CHAT_ID).split(",") if i.strip()}
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))   # 0 disables the endpoint
+
+# timeframes: the feed each one is built from, and how far back it goes.
+# 15m and 1h are resampled locally from the 5m feed, never fetched
+TIMEFRAMES = ("1m", "5m", "15m", "1h", "1d")
+INTRADAY_BASE = {
+    "1m": ("1m", "7d"),
+    "5m": ("5m", "60d"),
+    "15m": ("5m", "60d"),
+    "1h": ("5m", "60d"),
+}
+SIGNAL_TIMEFRAMES = ["1d"]      # timeframes the auto signal engine evaluates
+
+# serving: long polling, or a local webhook server behind a proxy / load balancer
+BOT_MODE = os.getenv("BOT_MODE", "polling")                 # "polling" or "webhook"
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")                  # public url Telegram posts to, registered at startup
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")            # checked against X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "32"))   # updates handled at once
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")        # empty = api.telegram.org
+RUN_JOBS = os.getenv("RUN_JOBS", "1") != "0"                # only one replica should poll and send signals
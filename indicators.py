@@ -1,6 +1,11 @@
-import pandas as pd
+import math
+
+import lazy
 import market
 
+# numpy kernels load on first use
+kernels = lazy.module("kernels")
+
 # =========================
 # SMA
 # =========================
@@ -9,8 +14,8 @@ def calculate_sma_from_data(closes, period=20):
         if closes is None or len(closes) < period:
             return None
 
-        series = pd.Series(closes)
-        sma = series.rolling(window=period).mean().iloc[-1]
+        # only the last window matters, so only it is converted
+        sma = kernels.sma(closes[-period:], period)[-1]
 
         return round(float(sma), 2)
 
@@ -27,8 +32,7 @@ def calculate_ema_from_data(closes, period=20):
         if closes is None or len(closes) < period:
             return None
 
-        series = pd.Series(closes)
-        ema = series.ewm(span=period, adjust=False).mean().iloc[-1]
+        ema = kernels.ema(closes, period)[-1]
 
         return round(float(ema), 2)
 
@@ -37,31 +41,27 @@ def calculate_ema_from_data(closes, period=20):
         return None
     
 
-def calculate_ema(symbol, period=20):
+def calculate_ema(symbol, period=20, interval="1d"):
     try:
-        symbol = market.normalize_symbol(symbol)
-
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=2y&interval=1d"
-        data = market.fetch_data(url)
+        closes = market.get_candles(symbol, range=market.history_range(interval, "2y"), interval=interval)
 
-        if not data:
+        if not closes:
             return None
 
-        result = data.get("chart", {}).get("result")
-        if not result:
-            return None
+        return calculate_ema_from_data(closes, period)
 
-        closes = result[0]["indicators"]["quote"][0]["close"]
+    except Exception as e:
+        print("EMA error:", e)
+        return None
 
-        df = pd.DataFrame(closes, columns=["close"])
-        df.dropna(inplace=True)
 
-        if len(df) < period:
+async def calculate_ema_async(symbol, period=20, interval="1d"):
+    try:
+        closes = await market.get_candles_async(symbol, range=market.history_range(interval, "2y"), interval=interval)
+        if not closes:
             return None
 
-        ema = df["close"].ewm(span=period, adjust=False).mean().iloc[-1]
-
-        return round(float(ema), 2)
+        return calculate_ema_from_data(closes, period)
 
     except Exception as e:
         print("EMA error:", e)
@@ -69,63 +69,50 @@ def calculate_ema(symbol, period=20):
 
 
 
-import pandas as pd
 from market import fetch_data, normalize_symbol
 
-def calculate_sma(symbol, period=20):
+def calculate_sma(symbol, period=20, interval="1d"):
     try:
-        symbol = market.normalize_symbol(symbol)
+        closes = market.get_candles(symbol, range=market.history_range(interval, "6mo"), interval=interval)
 
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=6mo&interval=1d"
-        data = market.fetch_data(url)
-
-        if not data:
+        if not closes:
             return None
 
-        result = data.get("chart", {}).get("result")
-        if not result:
-            return None
+        return calculate_sma_from_data(closes, period)
 
-        closes = result[0]["indicators"]["quote"][0]["close"]
+    except Exception as e:
+        print("SMA error:", e)
+        return None
 
-        df = pd.DataFrame(closes, columns=["close"])
-        df.dropna(inplace=True)
 
-        if len(df) < period:
+async def calculate_sma_async(symbol, period=20, interval="1d"):
+    try:
+        closes = await market.get_candles_async(symbol, range=market.history_range(interval, "6mo"), interval=interval)
+        if not closes:
             return None
 
-        sma = df["close"].rolling(window=period).mean().iloc[-1]
-
-        return round(float(sma), 2)
+        return calculate_sma_from_data(closes, period)
 
     except Exception as e:
         print("SMA error:", e)
         return None
 
+
 # =========================
 # RSI
 # =========================
-def calculate_rsi_from_data(closes, period=14):
+def calculate_rsi_from_data(closes, period=14, wilder=False):
     try:
         if closes is None or len(closes) < period:
             return None
 
-        series = pd.Series(closes)
-
-        delta = series.diff()
+        # simple rolling averages by default, Wilder's smoothing on request
+        if wilder:
+            rsi_value = kernels.rsi_wilder(closes, period)[-1]
+        else:
+            rsi_value = kernels.rsi(closes[-(period + 1):], period)[-1]
 
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-
-        rsi_value = rsi.iloc[-1]
-
-        if pd.isna(rsi_value):
+        if math.isnan(rsi_value):
             return None
 
         return round(float(rsi_value), 2)
@@ -135,25 +122,25 @@ def calculate_rsi_from_data(closes, period=14):
         return None
 
 
-def calculate_rsi(symbol, period=14):
+def calculate_rsi(symbol, period=14, interval="1d"):
     try:
-        from market import fetch_data, normalize_symbol
+        closes = market.get_candles(symbol, range=market.history_range(interval, "2y"), interval=interval)
+        if not closes:
+            return None
 
-        symbol = market.normalize_symbol(symbol)
+        return calculate_rsi_from_data(closes, period)
 
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=2y&interval=1d"
+    except Exception as e:
+        print("RSI wrapper error:", e)
+        return None
 
-        data = market.fetch_data(url)
-        if not data:
-            return None
 
-        result = data.get("chart", {}).get("result")
-        if not result:
+async def calculate_rsi_async(symbol, period=14, interval="1d"):
+    try:
+        closes = await market.get_candles_async(symbol, range=market.history_range(interval, "2y"), interval=interval)
+        if not closes:
             return None
 
-        closes = result[0]["indicators"]["quote"][0]["close"]
-        closes = [c for c in closes if c is not None]
-
         return calculate_rsi_from_data(closes, period)
 
     except Exception as e:
@@ -169,21 +156,28 @@ def calculate_volatility(closes, period=14):
     if len(closes) < period + 1:
         return None
 
-    moves = []
+    return float(kernels.volatility(closes[-(period + 1):], period)[-1])
+
+
+def calculate_atr_from_data(highs, lows, closes, period=14):
+    try:
+        if closes is None or len(closes) < period:
+            return None
 
-    for i in range(1, len(closes)):
-        moves.append(abs(closes[i] - closes[i-1]))
+        return round(float(kernels.atr(highs, lows, closes, period)[-1]), 2)
 
-    avg_move = sum(moves[-period:]) / period
-    return avg_move
+    except Exception as e:
+        print("ATR error:", e)
+        return None
 
 
 # ===============================
 # TARGET PRICE CALCULATOR
 # ===============================
-def calculate_targets(closes, trend, price):
+def calculate_targets(closes, trend, price, volatility=None):
 
-    volatility = calculate_volatility(closes)
+    if volatility is None:
+        volatility = calculate_volatility(closes)
 
     if volatility is None:
         return None
@@ -0,0 +1,189 @@
+import numpy as np
+
+# largest growth allowed inside one block of the recursive filter, e**200
+_BLOCK_GROWTH = 200.0
+
+
+# ===============================
+# HELPERS
+# ===============================
+def as_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _output(values, out):
+    if out is None:
+        return np.empty(len(values), dtype=np.float64)
+    if out.shape != values.shape or out.dtype != np.float64:
+        raise ValueError("out must be a float64 array shaped like the input")
+    return out
+
+
+def _smooth(x, alpha, out, start):
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t-1] for t > start, out[start] is the seed.
+    # within a block the recursion is a scaled cumulative sum; blocks are sized
+    # so the scale factor stays far from overflow, whatever the series length
+    decay = 1.0 - alpha
+    n = len(x)
+
+    if decay <= 0:
+        out[start + 1:] = x[start + 1:]
+        return out
+
+    block = max(1, int(_BLOCK_GROWTH / -np.log(decay)))
+    prev = out[start]
+    i = start + 1
+
+    while i < n:
+        j = min(n, i + block)
+        scale = decay ** -np.arange(1, j - i + 1, dtype=np.float64)
+        acc = np.cumsum(alpha * x[i:j] * scale)
+        out[i:j] = (prev + acc) / scale
+        prev = out[j - 1]
+        i = j
+
+    return out
+
+
+def _window_mean(x, period, out):
+    # trailing mean, NaN until the first window is full
+    csum = np.cumsum(x)
+    total = csum[period - 1:].copy()
+    total[1:] -= csum[:-period]
+
+    out[:period - 1] = np.nan
+    out[period - 1:] = total / period
+    return out
+
+
+def _diffs(values):
+    d = np.empty(len(values), dtype=np.float64)
+    d[0] = np.nan
+    np.subtract(values[1:], values[:-1], out=d[1:])
+    return d
+
+
+# ===============================
+# MOVING AVERAGES
+# ===============================
+def sma(values, period, out=None):
+    values = as_array(values)
+    out = _output(values, out)
+
+    if len(values) < period:
+        out[:] = np.nan
+        return out
+
+    return _window_mean(values, period, out)
+
+
+def ema(values, period, out=None):
+    # pandas ewm(span=period, adjust=False): seeded with the first value
+    values = as_array(values)
+    out = _output(values, out)
+
+    if not len(values):
+        return out
+
+    out[0] = values[0]
+    return _smooth(values, 2.0 / (period + 1), out, 0)
+
+
+# ===============================
+# RSI
+# ===============================
+def _rsi_from_averages(avg_gain, avg_loss, out):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        np.divide(avg_gain, avg_loss, out=out)
+        out += 1
+        np.divide(100.0, out, out=out)
+        np.subtract(100.0, out, out=out)
+    return out
+
+
+def rsi(values, period=14, out=None):
+    # simple rolling averages of gains and losses, as the bot has always used
+    values = as_array(values)
+    out = _output(values, out)
+
+    if len(values) <= period:
+        out[:] = np.nan
+        return out
+
+    d = _diffs(values)
+    gain = np.clip(d[1:], 0, None)
+    loss = np.clip(-d[1:], 0, None)
+
+    avg_gain = np.full(len(values), np.nan)
+    avg_loss = np.full(len(values), np.nan)
+    _window_mean(gain, period, avg_gain[1:])
+    _window_mean(loss, period, avg_loss[1:])
+
+    return _rsi_from_averages(avg_gain, avg_loss, out)
+
+
+def _wilder(x, period, first):
+    # seeded with the mean of the first window, then alpha = 1 / period
+    avg = np.full(len(x), np.nan)
+    avg[first + period - 1] = x[first:first + period].mean()
+    return _smooth(x, 1.0 / period, avg, first + period - 1)
+
+
+def rsi_wilder(values, period=14, out=None):
+    values = as_array(values)
+    out = _output(values, out)
+
+    if len(values) <= period:
+        out[:] = np.nan
+        return out
+
+    d = _diffs(values)
+    gain = np.clip(d, 0, None)
+    loss = np.clip(-d, 0, None)
+
+    return _rsi_from_averages(_wilder(gain, period, 1), _wilder(loss, period, 1), out)
+
+
+# ===============================
+# RANGE / VOLATILITY
+# ===============================
+def true_range(high, low, close, out=None):
+    high, low, close = as_array(high), as_array(low), as_array(close)
+    out = _output(close, out)
+
+    if not len(close):
+        return out
+
+    prev = close[:-1]
+    np.subtract(high, low, out=out)
+    np.maximum(out[1:], np.abs(high[1:] - prev), out=out[1:])
+    np.maximum(out[1:], np.abs(low[1:] - prev), out=out[1:])
+    return out
+
+
+def atr(high, low, close, period=14, out=None):
+    # Wilder's average true range
+    tr = true_range(high, low, close)
+    out = _output(tr, out)
+
+    if len(tr) < period:
+        out[:] = np.nan
+        return out
+
+    out[:] = _wilder(tr, period, 0)
+    return out
+
+
+def volatility(values, period=14, out=None):
+    # mean absolute close-to-close move over the last period bars
+    values = as_array(values)
+    out = _output(values, out)
+
+    if len(values) <= period:
+        out[:] = np.nan
+        return out
+
+    moves = np.abs(_diffs(values)[1:])
+    out[0] = np.nan
+    _window_mean(moves, period, out[1:])
+    return out
@@ -0,0 +1,41 @@
+import importlib
+import time
+
+# name -> seconds spent importing, filled on first use
+loaded = {}
+
+
+# ===============================
+# DEFERRED MODULES
+# ===============================
+class LazyModule:
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            started = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            loaded[self._name] = time.perf_counter() - started
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "deferred"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def module(name):
+    # heavy dependencies are imported on first attribute access, not at startup
+    return LazyModule(name)
+
+
+def report():
+    if not loaded:
+        return "Lazy imports: none loaded yet"
+    parts = [f"{name} {seconds * 1000:.0f}ms" for name, seconds in sorted(loaded.items(), key=lambda i: -i[1])]
+    return "Lazy imports: " + ", ".join(parts)
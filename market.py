@@ -1,81 +1,510 @@
-import requests
+import asyncio
+import threading
+import time
+import httpx
 from datetime import datetime
 import pytz
 
+import config
+import lazy
+import metrics
+import nse_calendar
+from cache import TTLCache
+
+# numpy (via the store) and requests load on first use
+candle_store = lazy.module("candle_store")
+requests = lazy.module("requests")
+
+INDIA = pytz.timezone("Asia/Kolkata")
+
+# process-wide chart cache keyed by (symbol, range, interval)
+candle_cache = TTLCache(maxsize=config.CANDLE_CACHE_SIZE)
+
+# ranges whose last daily close is good enough for a price lookup
+PRICE_RANGES = ("1d", "3mo", "6mo", "2y")
+
 def normalize_symbol(symbol):
     symbol = symbol.upper().replace(".NS", "")
     return symbol + ".NS"
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0"
+}
+
+
+# =========================
+# HTTP CLIENTS (pooled)
+# =========================
+_session = None
+_async_client = None
+_async_loop = None
+_host_slots = {}
+
+def _sync_session():
+    global _session
+
+    # only the sync path (backtests, scripts) needs requests
+    if _session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        session.mount("https://", requests.adapters.HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=config.HTTP_MAX_KEEPALIVE,
+        ))
+        _session = session
+
+    return _session
+
+def _client():
+    global _async_client, _async_loop, _host_slots
+
+    # httpx connections belong to the loop that opened them
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=httpx.Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=30,
+            ),
+        )
+        _async_loop = loop
+        _host_slots = {}
+
+    return _async_client
+
+def _host_slot(url):
+    host = httpx.URL(url).host
+    if host not in _host_slots:
+        _host_slots[host] = asyncio.Semaphore(config.HTTP_PER_HOST_LIMIT)
+    return _host_slots[host]
+
+async def close_http():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+def _endpoint(url):
+    # ".../v8/finance/chart/SBIN.NS?..." -> "chart"
+    path = url.split("?")[0].split("/finance/")
+    return path[1].split("/")[0] if len(path) > 1 else "other"
+
+def _record(url, started, ok):
+    endpoint = _endpoint(url)
+    metrics.inc("yahoo_requests_total", endpoint=endpoint)
+    metrics.observe("yahoo_request_latency_seconds", time.perf_counter() - started, endpoint=endpoint)
+    if not ok:
+        metrics.inc("yahoo_errors_total", endpoint=endpoint)
+
 def fetch_data(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
+    started = time.perf_counter()
+    try:
+        response = _sync_session().get(url, timeout=config.HTTP_TIMEOUT)
+        if response.status_code != 200:
+            print("Bad status:", response.status_code)
+            _record(url, started, False)
+            return None
+        data = response.json()
+        _record(url, started, True)
+        return data
+    except Exception as e:
+        print("Fetch error:", e)
+        _record(url, started, False)
+        return None
+
+async def fetch_data_async(url):
+    started = time.perf_counter()
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        client = _client()
+        async with _host_slot(url):
+            response = await client.get(url)
         if response.status_code != 200:
             print("Bad status:", response.status_code)
+            _record(url, started, False)
             return None
-        return response.json()
+        data = response.json()
+        _record(url, started, True)
+        return data
     except Exception as e:
         print("Fetch error:", e)
+        _record(url, started, False)
         return None
 
+
+# =========================
+# CACHE TTL
+# =========================
+def next_market_open(now=None):
+    # holidays and special sessions come from the NSE calendar
+    return nse_calendar.next_open(now)
+
+def cache_ttl():
+    if is_market_open():
+        return config.CANDLE_CACHE_TTL
+
+    # nothing changes upstream until the next session starts
+    now = datetime.now(INDIA)
+    return max(config.CANDLE_CACHE_TTL, (next_market_open(now) - now).total_seconds())
+
+def cache_stats():
+    return candle_cache.stats()
+
+metrics.gauge("cache_hit_ratio", lambda: {(("cache", "candles"),): candle_cache.stats()["hit_rate"]})
+metrics.gauge("cache_entries", lambda: {(("cache", "candles"),): len(candle_cache)})
+
+
+# =========================
+# DATA VERSIONS
+# =========================
+# bumped whenever new bars or prices arrive for a symbol, so anything derived
+# from the data (rendered replies) can tell whether it is still current
+_versions = {}
+_fingerprints = {}
+
+def _note_data(symbol, source, result):
+    timestamps = result.get("timestamp") or []
+    closes = result.get("indicators", {}).get("quote", [{}])[0].get("close") or []
+    fingerprint = (timestamps[-1] if timestamps else None, closes[-1] if closes else None)
+
+    key = (symbol, source)
+    if _fingerprints.get(key) != fingerprint:
+        _fingerprints[key] = fingerprint
+        _versions[symbol] = _versions.get(symbol, 0) + 1
+
+def data_version(symbol):
+    return _versions.get(normalize_symbol(symbol), 0)
+
+
+# =========================
+# CHART FETCH (cached)
+# =========================
+def chart_url(symbol, range, interval):
+    return f"{config.YAHOO_BASE_URL}/v8/finance/chart/{symbol}?range={range}&interval={interval}"
+
+def _store_chart(key, data):
+    if not data:
+        return None
+
+    result = data.get("chart", {}).get("result")
+    if not result:
+        return None
+
+    candle_cache.set(key, result[0], cache_ttl())
+    _note_data(key[0], key[2], result[0])
+    return result[0]
+
+def _chart_from_store(key, bars):
+    symbol, range, interval = key
+
+    bars = candle_store.window(bars, range)
+    if bars is None or not len(bars):
+        return None
+
+    result = candle_store.chart_from_bars(symbol, bars)
+    candle_cache.set(key, result, cache_ttl())
+    _note_data(symbol, interval, result)
+    return result
+
+# =========================
+# SINGLE FLIGHT
+# =========================
+# concurrent misses for the same key share one upstream fetch
+_flights = {}
+_sync_flights = {}
+_sync_flights_lock = threading.Lock()
+
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+async def _single_flight(key, factory):
+    key = (id(asyncio.get_running_loop()), key)
+
+    task = _flights.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _flights[key] = task
+        task.add_done_callback(lambda _: _flights.pop(key, None))
+        metrics.inc("singleflight_total", role="leader")
+    else:
+        metrics.inc("singleflight_total", role="shared")
+
+    # one waiter giving up must not cancel the fetch for the others
+    return await asyncio.shield(task)
+
+def _single_flight_sync(key, fn):
+    with _sync_flights_lock:
+        flight = _sync_flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _sync_flights[key] = _Flight()
+
+    if not leader:
+        metrics.inc("singleflight_total", role="shared")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    metrics.inc("singleflight_total", role="leader")
+    try:
+        flight.result = fn()
+        return flight.result
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _sync_flights_lock:
+            _sync_flights.pop(key, None)
+        flight.done.set()
+
+
+# =========================
+# CHART LOOKUP
+# =========================
+def _refresh_store(symbol, interval):
+    # stored history, topped up with only the bars we have not seen
+    bars = candle_store.load(symbol, interval)
+    if candle_store.is_fresh(symbol, interval):
+        return bars
+
+    full = candle_store.needs_full(symbol, interval, bars)
+    data = fetch_data(candle_store.delta_url(symbol, interval, bars, full))
+    return candle_store.apply_delta(symbol, interval, data, cache_ttl(), full)
+
+async def _refresh_store_async(symbol, interval):
+    bars = candle_store.load(symbol, interval)
+    if candle_store.is_fresh(symbol, interval):
+        return bars
+
+    full = candle_store.needs_full(symbol, interval, bars)
+    data = await fetch_data_async(candle_store.delta_url(symbol, interval, bars, full))
+    return await asyncio.to_thread(candle_store.apply_delta, symbol, interval, data, cache_ttl(), full)
+
+def _source(interval, range):
+    # (stored feed, minutes to resample to) for timeframes built locally,
+    # (None, None) when the store can't serve the whole range
+    base = config.INTRADAY_BASE.get(interval)
+    feed = base[0] if base else interval
+    if feed not in config.CANDLE_STORE_INTERVALS or not candle_store.covers(feed, range):
+        return None, None
+    if feed != interval:
+        return feed, candle_store.TIMEFRAME_MINUTES[interval]
+    return feed, None
+
+def history_range(interval, daily="3mo"):
+    if interval == "1d":
+        return daily
+    return config.INTRADAY_BASE[interval][1]
+
+def get_chart(symbol, range="3mo", interval="1d"):
+    symbol = normalize_symbol(symbol)
+    key = (symbol, range, interval)
+
+    result = candle_cache.get(key)
+    if result is not None:
+        return result
+
+    feed, minutes = _source(interval, range)
+    if feed is None:
+        return _single_flight_sync(key, lambda: _store_chart(key, fetch_data(chart_url(symbol, range, interval))))
+
+    # every range and timeframe on one feed shares the same store refresh
+    bars = _single_flight_sync((symbol, "*", feed), lambda: _refresh_store(symbol, feed))
+    if minutes:
+        bars = candle_store.resample(bars, minutes)
+    return _chart_from_store(key, bars)
+
+async def get_chart_async(symbol, range="3mo", interval="1d"):
+    symbol = normalize_symbol(symbol)
+    key = (symbol, range, interval)
+
+    result = candle_cache.get(key)
+    if result is not None:
+        return result
+
+    feed, minutes = _source(interval, range)
+    if feed is None:
+        async def fetch():
+            return _store_chart(key, await fetch_data_async(chart_url(symbol, range, interval)))
+
+        return await _single_flight(key, fetch)
+
+    bars = await _single_flight((symbol, "*", feed), lambda: _refresh_store_async(symbol, feed))
+    if minutes:
+        bars = candle_store.resample(bars, minutes)
+    return _chart_from_store(key, bars)
+
+def extract_closes(result):
+    closes = result["indicators"]["quote"][0]["close"]
+    return [c for c in closes if c is not None]
+
+def extract_series(result):
+    closes = result["indicators"]["quote"][0]["close"]
+    timestamps = result.get("timestamp") or list(range(len(closes)))
+
+    pairs = [(t, c) for t, c in zip(timestamps, closes) if c is not None]
+    return [t for t, _ in pairs], [c for _, c in pairs]
+
+def _last_close(result):
+    closes = extract_closes(result)
+    return closes[-1] if closes else None
+
+def _cached_daily(symbol, count_miss=False):
+    # any cached daily chart already carries today's close. a miss here is
+    # only counted by callers that fetch straight away; get_price falls
+    # through to get_chart, which counts it
+    return candle_cache.lookup([(symbol, r, "1d") for r in PRICE_RANGES], count_miss=count_miss)
+
 def get_price(symbol):
     
     symbol = normalize_symbol(symbol)
+
+    cached = _cached_daily(symbol)
+    if cached is not None:
+        return _last_close(cached)
+
     print("FETCHING price:", symbol)
     #yahoo fetch
     try:
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1d"
-        
-        data = fetch_data(url)
-        if not data:            
-            print(f"bad status for symbol {symbol}")
-            return None
-
-        result = data.get("chart", {}).get("result")
+        result = get_chart(symbol, range="1d", interval="1d")
         if not result:
             print(f"No result for symbol {symbol}")
             return None
-        
-        closes = result[0]['indicators']['quote'][0]['close']
-        closes = [c for c in closes if c is not None]
 
-        return closes[-1] if closes else None
+        return _last_close(result)
     
     except Exception as e:
         print("Error fetching price:", e)
         return None
 
+async def get_price_async(symbol):
 
-def is_market_open():
-    india = pytz.timezone("Asia/Kolkata")
-    now = datetime.now(india)
+    symbol = normalize_symbol(symbol)
 
-    #weekend block
-    if now.weekday() >= 5:  # 5 = Saturday, 6 = Sunday
-        return False
-    
-    #NSE timings: 9:15 AM to 3:30 PM IST
-    market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
-    market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
+    cached = _cached_daily(symbol)
+    if cached is not None:
+        return _last_close(cached)
+
+    print("FETCHING price:", symbol)
+    try:
+        result = await get_chart_async(symbol, range="1d", interval="1d")
+        if not result:
+            print(f"No result for symbol {symbol}")
+            return None
 
-    return market_open <= now <= market_close
+        return _last_close(result)
 
-def get_candles(symbol, range="3mo", interval="1d"):
-    symbol = normalize_symbol(symbol)
+    except Exception as e:
+        print("Error fetching price:", e)
+        return None
 
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range={range}&interval={interval}"
 
-    data = fetch_data(url)
+# =========================
+# BATCHED QUOTES
+# =========================
+def spark_url(symbols):
+    joined = ",".join(symbols)
+    return f"{config.YAHOO_BASE_URL}/v7/finance/spark?symbols={joined}&range=1d&interval=1d"
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _spark_results(data):
+    # v7 shape: {"spark": {"result": [{"symbol", "response": [chart]}]}}
+    if "spark" in data:
+        for item in (data["spark"] or {}).get("result") or []:
+            response = item.get("response") or []
+            if response:
+                yield item.get("symbol"), response[0]
+        return
+
+    # flat shape: {"SBIN.NS": {"timestamp": [...], "close": [...]}}
+    for symbol, item in data.items():
+        if isinstance(item, dict) and "close" in item:
+            yield symbol, {
+                "meta": {"symbol": symbol},
+                "timestamp": item.get("timestamp") or [],
+                "indicators": {"quote": [{"close": item.get("close") or []}]},
+            }
+
+def _store_spark(data, prices):
     if not data:
-        return None
+        return
 
-    result = data.get("chart", {}).get("result")
+    ttl = cache_ttl()
+    for symbol, result in _spark_results(data):
+        if not symbol:
+            continue
+        candle_cache.set((symbol, "1d", "1d"), result, ttl)
+        _note_data(symbol, "spark", result)
+        prices[symbol] = _last_close(result)
+
+def _split_cached(symbols):
+    wanted = {}
+    for symbol in symbols:
+        wanted.setdefault(normalize_symbol(symbol), []).append(symbol)
+
+    prices = {}
+    missing = []
+    for norm in wanted:
+        cached = _cached_daily(norm, count_miss=True)
+        if cached is not None:
+            prices[norm] = _last_close(cached)
+        else:
+            missing.append(norm)
+
+    return wanted, prices, missing
+
+def _by_caller(wanted, prices):
+    result = {}
+    for norm, originals in wanted.items():
+        for symbol in originals:
+            result[symbol] = prices.get(norm)
+    return result
+
+def get_prices(symbols):
+    wanted, prices, missing = _split_cached(symbols)
+
+    for chunk in _chunks(missing, config.QUOTE_BATCH_SIZE):
+        print("FETCHING prices:", len(chunk))
+        _store_spark(fetch_data(spark_url(chunk)), prices)
+
+    return _by_caller(wanted, prices)
+
+async def get_prices_async(symbols):
+    wanted, prices, missing = _split_cached(symbols)
+
+    chunks = _chunks(missing, config.QUOTE_BATCH_SIZE)
+    if chunks:
+        print("FETCHING prices:", len(missing))
+    responses = await asyncio.gather(*[fetch_data_async(spark_url(c)) for c in chunks])
+    for data in responses:
+        _store_spark(data, prices)
+
+    return _by_caller(wanted, prices)
+
+
+def is_market_open(now=None):
+    # NSE sessions: 9:15 AM to 3:30 PM IST, minus holidays, plus special sessions
+    return nse_calendar.is_open(now)
+
+def get_candles(symbol, range="3mo", interval="1d"):
+    result = get_chart(symbol, range, interval)
     if not result:
         return None
 
-    closes = result[0]["indicators"]["quote"][0]["close"]
-    closes = [c for c in closes if c is not None]
+    return extract_closes(result)
+
+async def get_candles_async(symbol, range="3mo", interval="1d"):
+    result = await get_chart_async(symbol, range, interval)
+    if not result:
+        return None
 
-    return closes
\ No newline at end of file
+    return extract_closes(result)
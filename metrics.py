@@ -0,0 +1,227 @@
+import functools
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RESERVOIR = 1024    # recent samples kept for percentiles
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# ===============================
+# HISTOGRAM
+# ===============================
+class Histogram:
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=RESERVOIR)
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+        self.count += 1
+        self.total += value
+        self.recent.append(value)
+
+    def percentile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# ===============================
+# RECORDING
+# ===============================
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        if key not in _histograms:
+            _histograms[key] = Histogram()
+        _histograms[key].observe(value)
+
+
+def gauge(name, fn):
+    # evaluated at read time, fn returns {labels-tuple: value} or a number
+    _gauges[name] = fn
+
+
+def track_command(name, handler):
+
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await handler(update, context)
+        except Exception:
+            inc("bot_command_errors_total", command=name)
+            raise
+        finally:
+            observe("bot_command_latency_seconds", time.perf_counter() - started, command=name)
+
+    return wrapper
+
+
+def track_job(name, interval):
+
+    def decorate(job):
+
+        # works for job-queue callbacks and tick bus consumers alike
+        @functools.wraps(job)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await job(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                observe("bot_job_duration_seconds", elapsed, job=name)
+                inc("bot_job_runs_total", job=name)
+                if elapsed > interval:
+                    inc("bot_job_overruns_total", job=name)
+
+        return wrapper
+
+    return decorate
+
+
+# ===============================
+# EXPORT
+# ===============================
+def _labels(pairs, extra=()):
+    items = list(pairs) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    lines = []
+
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: (list(h.buckets), h.count, h.total) for k, h in _histograms.items()}
+
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_labels(labels)} {value}")
+
+    for name in sorted({k[0] for k in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (n, labels), (buckets, count, total) in sorted(histograms.items()):
+            if n != name:
+                continue
+            running = 0
+            for bound, hits in zip(list(BUCKETS) + ["+Inf"], buckets):
+                running += hits
+                lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {running}")
+            lines.append(f"{name}_sum{_labels(labels)} {round(total, 6)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+    for name, fn in sorted(_gauges.items()):
+        lines.append(f"# TYPE {name} gauge")
+        value = fn()
+        if isinstance(value, dict):
+            for labels, v in sorted(value.items()):
+                lines.append(f"{name}{_labels(labels)} {v}")
+        else:
+            lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def summary():
+    lines = ["📈 BOT STATS", ""]
+
+    with _lock:
+        histograms = dict(_histograms)
+        counters = dict(_counters)
+
+    lines.append("Commands (p50 / p95 / p99, n):")
+    for (name, labels), h in sorted(histograms.items()):
+        if name == "bot_command_latency_seconds":
+            lines.append(
+                f"  /{dict(labels)['command']}: {_ms(h.percentile(0.5))} / "
+                f"{_ms(h.percentile(0.95))} / {_ms(h.percentile(0.99))}, {h.count}"
+            )
+
+    lines.append("")
+    lines.append("Yahoo (requests / errors, p95):")
+    for (name, labels), h in sorted(histograms.items()):
+        if name == "yahoo_request_latency_seconds":
+            endpoint = dict(labels)["endpoint"]
+            errors = counters.get(_key("yahoo_errors_total", {"endpoint": endpoint}), 0)
+            lines.append(f"  {endpoint}: {h.count} / {errors}, {_ms(h.percentile(0.95))}")
+
+    lines.append("")
+    lines.append("Jobs (p95, runs, overruns):")
+    for (name, labels), h in sorted(histograms.items()):
+        if name == "bot_job_duration_seconds":
+            job = dict(labels)["job"]
+            overruns = counters.get(_key("bot_job_overruns_total", {"job": job}), 0)
+            lines.append(f"  {job}: {_ms(h.percentile(0.95))}, {h.count}, {overruns}")
+
+    if "cache_hit_ratio" in _gauges:
+        lines.append("")
+        lines.append("Cache hit rate:")
+        for labels, value in sorted(_gauges["cache_hit_ratio"]().items()):
+            lines.append(f"  {dict(labels)['cache']}: {value:.1%}")
+
+    return "\n".join(lines)
+
+
+# ===============================
+# PROMETHEUS HTTP ENDPOINT
+# ===============================
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(host, port):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
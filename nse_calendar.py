@@ -0,0 +1,140 @@
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytz
+
+INDIA = pytz.timezone("Asia/Kolkata")
+IST = timezone(timedelta(hours=5, minutes=30))   # no DST, so a fixed offset is exact
+
+REGULAR_OPEN = time(9, 15)
+REGULAR_CLOSE = time(15, 30)
+
+# NSE trading holidays (equity segment), from the exchange circulars.
+# add the next year's list when NSE publishes it in December
+HOLIDAYS = {
+    date(2025, 2, 26),   # Mahashivratri
+    date(2025, 3, 14),   # Holi
+    date(2025, 3, 31),   # Id-Ul-Fitr
+    date(2025, 4, 10),   # Mahavir Jayanti
+    date(2025, 4, 14),   # Ambedkar Jayanti
+    date(2025, 4, 18),   # Good Friday
+    date(2025, 5, 1),    # Maharashtra Day
+    date(2025, 8, 15),   # Independence Day
+    date(2025, 8, 27),   # Ganesh Chaturthi
+    date(2025, 10, 2),   # Gandhi Jayanti / Dussehra
+    date(2025, 10, 21),  # Diwali Laxmi Pujan (muhurat session only)
+    date(2025, 10, 22),  # Diwali Balipratipada
+    date(2025, 11, 5),   # Prakash Gurpurb
+    date(2025, 12, 25),  # Christmas
+
+    date(2026, 1, 15),   # Municipal elections (Maharashtra)
+    date(2026, 1, 26),   # Republic Day
+    date(2026, 3, 3),    # Holi
+    date(2026, 3, 26),   # Ram Navami
+    date(2026, 3, 31),   # Mahavir Jayanti
+    date(2026, 4, 3),    # Good Friday
+    date(2026, 4, 14),   # Ambedkar Jayanti
+    date(2026, 5, 1),    # Maharashtra Day
+    date(2026, 5, 28),   # Bakri Id
+    date(2026, 6, 26),   # Muharram
+    date(2026, 9, 14),   # Ganesh Chaturthi
+    date(2026, 10, 2),   # Gandhi Jayanti
+    date(2026, 10, 20),  # Dussehra
+    date(2026, 11, 10),  # Diwali Balipratipada
+    date(2026, 11, 24),  # Guru Nanak Jayanti
+    date(2026, 12, 25),  # Christmas
+}
+
+# sessions outside the regular timetable: (open, close), on any day of the week
+SPECIAL_SESSIONS = {
+    date(2025, 2, 1): (time(9, 15), time(15, 30)),     # Union Budget (Saturday)
+    date(2025, 10, 21): (time(13, 45), time(14, 45)),  # Muhurat trading
+    date(2026, 2, 1): (time(9, 15), time(15, 30)),     # Union Budget (Sunday)
+}
+
+FIRST_YEAR = 2025
+LAST_YEAR = 2026    # last published holiday list; later years fall back to weekdays only
+
+
+# ===============================
+# PRECOMPUTED SESSIONS
+# ===============================
+def _at(day, clock):
+    return datetime.combine(day, clock, tzinfo=IST)
+
+
+def session_for(day):
+    if day in SPECIAL_SESSIONS:
+        opening, closing = SPECIAL_SESSIONS[day]
+        return _at(day, opening), _at(day, closing)
+
+    if day.weekday() >= 5 or day in HOLIDAYS:
+        return None
+
+    return _at(day, REGULAR_OPEN), _at(day, REGULAR_CLOSE)
+
+
+def _build(first_year, last_year):
+    sessions = []
+    day = date(first_year, 1, 1)
+    while day.year <= last_year:
+        session = session_for(day)
+        if session:
+            sessions.append(session)
+        day += timedelta(days=1)
+    return sessions
+
+
+SESSIONS = _build(FIRST_YEAR, LAST_YEAR)
+_OPENS = [s[0].timestamp() for s in SESSIONS]
+
+
+def _now(now):
+    return now or datetime.now(INDIA)
+
+
+def _precomputed(now):
+    return FIRST_YEAR <= now.astimezone(INDIA).year <= LAST_YEAR
+
+
+def _index(now):
+    # index of the last session that opened at or before now, -1 if none
+    return bisect_right(_OPENS, now.timestamp()) - 1
+
+
+# ===============================
+# QUERIES
+# ===============================
+def current_session(now=None):
+    now = _now(now)
+
+    if _precomputed(now):
+        i = _index(now)
+        session = SESSIONS[i] if i >= 0 else None
+    else:
+        session = session_for(now.astimezone(INDIA).date())
+
+    if session and session[0] <= now <= session[1]:
+        return session
+    return None
+
+
+def is_open(now=None):
+    return current_session(now) is not None
+
+
+def next_open(now=None):
+    now = _now(now)
+
+    if _precomputed(now):
+        i = _index(now) + 1
+        if i < len(SESSIONS):
+            return SESSIONS[i][0]
+
+    # outside the precomputed years, walk the days
+    day = now.astimezone(INDIA).date()
+    while True:
+        session = session_for(day)
+        if session and session[0] > now:
+            return session[0]
+        day += timedelta(days=1)
@@ -0,0 +1,252 @@
+import asyncio
+import time
+from collections import deque
+
+from telegram.error import BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter, TelegramError
+
+import config
+import metrics
+
+# drop reasons that say nothing about the message itself; anything queued
+# for a later attempt is worth sending again
+RETRYABLE = {"network", "overflow", "shutdown"}
+
+
+# ===============================
+# OUTBOUND QUEUE
+# ===============================
+class Outbox:
+
+    def __init__(self, bot=None, rate=None, chat_interval=None):
+        self.bot = bot
+        self.rate = rate or config.SEND_GLOBAL_RATE
+        self.chat_interval = config.SEND_CHAT_INTERVAL if chat_interval is None else chat_interval
+
+        self.pending = {}       # chat_id -> deque of [text, digest, attempts, on_done]
+        self.next_at = {}       # chat_id -> monotonic time the chat may be sent to again
+        self.paused_until = 0   # set by a flood-limit reply
+        self.recent = deque()   # monotonic times of sends in the last second
+
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = None
+        self._callbacks = set()
+
+    def enqueue(self, chat_id, text, digest=None, on_done=None):
+        # returns at once; messages with the same digest title coalesce.
+        # on_done(outcome) runs once the message is delivered ("sent") or
+        # given up on (the drop reason), and may be a coroutine function
+        queue = self.pending.get(chat_id)
+        if queue is None:
+            queue = self.pending[chat_id] = deque()
+
+        if len(queue) >= config.OUTBOX_CHAT_LIMIT:
+            metrics.inc("outbox_dropped_total", reason="overflow")
+            self._settle([queue.popleft()], "overflow")
+
+        queue.append([text, digest, 0, on_done])
+        self._idle.clear()
+        self._wake.set()
+
+    def __len__(self):
+        return sum(len(q) for q in self.pending.values())
+
+    # ===============================
+    # WORKER
+    # ===============================
+    def start(self, bot=None):
+        if bot is not None:
+            self.bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout=5):
+        # give queued messages a chance to go out before shutting down
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            print("Outbox: dropping", len(self), "unsent messages")
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        for chat_id in list(self.pending):
+            self._settle(self.pending.pop(chat_id), "shutdown")
+
+        # delivery callbacks (e.g. deleting fired alerts) finish before the
+        # storage they write to is closed
+        if self._callbacks:
+            await asyncio.gather(*self._callbacks, return_exceptions=True)
+
+    def _ready_at(self, chat_id, now):
+        while self.recent and now - self.recent[0] >= 1:
+            self.recent.popleft()
+
+        at = max(self.next_at.get(chat_id, 0), self.paused_until)
+        if len(self.recent) >= self.rate:
+            at = max(at, self.recent[0] + 1)
+        return at
+
+    async def _run(self):
+        while True:
+            if not self.pending:
+                self._idle.set()
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            now = time.monotonic()
+
+            # the chat that can be served soonest; ties go to the oldest
+            chat_id = min(self.pending, key=lambda c: self.next_at.get(c, 0))
+            delay = self._ready_at(chat_id, now) - now
+
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            items = self._take(chat_id)
+            await self._send(chat_id, items)
+
+    def _take(self, chat_id):
+        queue = self.pending[chat_id]
+        items = [queue.popleft()]
+
+        digest = items[0][1]
+        while digest and queue and queue[0][1] == digest and len(items) < config.DIGEST_MAX:
+            items.append(queue.popleft())
+
+        if not queue:
+            del self.pending[chat_id]
+        return items
+
+    def _render(self, items):
+        text, digest = items[0][0], items[0][1]
+        if not digest:
+            return text
+        if len(items) == 1:
+            return f"{digest}\n{text}"
+        return f"{digest} ({len(items)})\n\n" + "\n\n".join(i[0] for i in items)
+
+    def _requeue(self, chat_id, items):
+        queue = self.pending.pop(chat_id, None) or deque()
+        queue.extendleft(reversed(items))
+
+        # keep the chat at the front of the rotation
+        self.pending = {chat_id: queue, **self.pending}
+
+    async def _send(self, chat_id, items):
+        now = time.monotonic()
+        self.recent.append(now)
+        self.next_at[chat_id] = now + self.chat_interval
+
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=self._render(items))
+            metrics.inc("outbox_sent_total")
+            metrics.inc("outbox_messages_total", amount=len(items))
+            self._settle(items, "sent")
+
+        except RetryAfter as e:
+            # flood limit: hold every chat, then retry the same messages
+            retry_after = e.retry_after
+            wait = retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+            print("Outbox: flood limit, retrying in", wait, "s")
+            metrics.inc("outbox_retry_after_total")
+            self.paused_until = time.monotonic() + wait
+            self._requeue(chat_id, items)
+
+        except ChatMigrated as e:
+            # the group became a supergroup; same messages, new chat id
+            print("Outbox: chat", chat_id, "moved to", e.new_chat_id)
+            self._requeue(e.new_chat_id, items)
+
+        except (BadRequest, Forbidden) as e:
+            print("Outbox: dropping message to", chat_id, e)
+            metrics.inc("outbox_dropped_total", reason="rejected")
+            self._settle(items, "rejected")
+
+        except NetworkError as e:
+            attempts = items[0][2] + 1
+            if attempts > config.SEND_RETRIES:
+                print("Outbox: giving up on", chat_id, e)
+                metrics.inc("outbox_dropped_total", reason="network")
+                self._settle(items, "network")
+                return
+
+            for item in items:
+                item[2] = attempts
+            self.next_at[chat_id] = time.monotonic() + 2 ** attempts
+            self._requeue(chat_id, items)
+
+        # anything else costs this message, never the worker
+        except TelegramError as e:
+            print("Outbox: dropping message to", chat_id, e)
+            metrics.inc("outbox_dropped_total", reason="telegram")
+            self._settle(items, "telegram")
+
+        except Exception as e:
+            print("Outbox: dropping message to", chat_id, "after", type(e).__name__, e)
+            metrics.inc("outbox_dropped_total", reason="error")
+            self._settle(items, "error")
+
+    def _settle(self, items, outcome):
+        for item in items:
+            on_done = item[3]
+            if on_done is None:
+                continue
+
+            try:
+                result = on_done(outcome)
+            except Exception as e:
+                print("Outbox: delivery callback failed:", e)
+                continue
+
+            if asyncio.iscoroutine(result):
+                task = asyncio.ensure_future(result)
+                self._callbacks.add(task)
+                task.add_done_callback(self._callback_done)
+
+    def _callback_done(self, task):
+        self._callbacks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print("Outbox: delivery callback failed:", task.exception())
+
+
+outbox = Outbox()
+
+metrics.gauge("outbox_pending", lambda: len(outbox))
+
+
+# ===============================
+# STUB BOT (local testing)
+# ===============================
+class StubBot:
+
+    def __init__(self, latency=0.0, flood_every=0, retry_after=1, errors=None):
+        self.sent = []
+        self.latency = latency
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.errors = errors or {}      # chat_id -> exception raised on every send
+        self.floods = []                # monotonic times a RetryAfter was raised
+        self.calls = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if chat_id in self.errors:
+            raise self.errors[chat_id]
+        if self.flood_every and self.calls % self.flood_every == 0:
+            self.floods.append(time.monotonic())
+            raise RetryAfter(self.retry_after)
+
+        self.sent.append((time.monotonic(), chat_id, text))
@@ -0,0 +1,117 @@
+import lazy
+import strategy
+
+np = lazy.module("numpy")
+
+
+# ===============================
+# CLOSE MATRIX
+# ===============================
+def close_matrix(histories, length=None):
+
+    # one row per symbol, right-aligned on the latest bar, NaN-padded on the left
+    length = length or max((len(h) for h in histories), default=0)
+    matrix = np.full((len(histories), length), np.nan, dtype=np.float64)
+
+    for row, closes in enumerate(histories):
+        tail = closes[-length:] if closes else []
+        if len(tail):
+            matrix[row, length - len(tail):] = tail
+
+    return matrix
+
+
+def valid_counts(matrix):
+    return np.count_nonzero(~np.isnan(matrix), axis=1)
+
+
+# ===============================
+# VECTORIZED INDICATORS
+# ===============================
+def ema_last(matrix, period):
+
+    # ewm(adjust=False) per row, seeded at each row's first close
+    alpha = 2 / (period + 1)
+    ema = np.full(matrix.shape[0], np.nan)
+
+    for col in range(matrix.shape[1]):
+        x = matrix[:, col]
+        ema = np.where(np.isnan(ema), x, alpha * x + (1 - alpha) * ema)
+
+    ema[valid_counts(matrix) < period] = np.nan
+    return np.round(ema, 2)
+
+
+def rsi_last(matrix, period=14):
+
+    window = np.diff(matrix[:, -(period + 1):], axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_gain = np.clip(window, 0, None).mean(axis=1)
+        avg_loss = np.clip(-window, 0, None).mean(axis=1)
+
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    rsi = np.where((avg_loss == 0) & (avg_gain > 0), 100.0, rsi)
+    rsi = np.where((avg_loss == 0) & (avg_gain == 0), np.nan, rsi)
+    rsi[valid_counts(matrix) < period + 1] = np.nan
+
+    return np.round(rsi, 2)
+
+
+# ===============================
+# TREND SCORE (same rules as strategy.calculate_trend_score)
+# ===============================
+def score_matrix(ema20, ema50, rsi, price):
+
+    score = 50 + np.where(ema20 > ema50, 20, -20)
+    score = score + np.where(price > ema20, 15, -15)
+    score = score + np.where(rsi > 60, 15, np.where(rsi < 40, -15, 0))
+
+    score = np.clip(score, 0, 100).astype(float)
+    score[np.isnan(ema20) | np.isnan(ema50) | np.isnan(rsi) | np.isnan(price)] = np.nan
+
+    return score
+
+
+def rank_symbols(symbols, histories, prices=None):
+
+    matrix = close_matrix(histories)
+    if matrix.size == 0:
+        return []
+
+    last = matrix[:, -1]
+    if prices:
+        last = np.array([prices.get(s) or c for s, c in zip(symbols, last)], dtype=np.float64)
+
+    ema20 = ema_last(matrix, 20)
+    ema50 = ema_last(matrix, 50)
+    rsi = rsi_last(matrix)
+    score = score_matrix(ema20, ema50, rsi, last)
+
+    rows = []
+    for i in np.flatnonzero(~np.isnan(score)):
+        rows.append({
+            "symbol": symbols[i],
+            "score": int(score[i]),
+            "bias": strategy.score_bias(score[i]),
+            "trend": strategy.trend_label(ema20[i], ema50[i], rsi[i]),
+            "rsi": float(rsi[i]),
+            "price": round(float(last[i]), 2),
+        })
+
+    # strongest bullish first, rsi breaks ties
+    rows.sort(key=lambda r: (r["score"], r["rsi"]), reverse=True)
+    return rows
+
+
+def format_table(rows):
+    lines = ["📋 WATCHLIST SCAN", ""]
+
+    for n, row in enumerate(rows, 1):
+        lines.append(
+            f"{n:>2}. {row['symbol']:<11} {row['score']:>3}  "
+            f"{row['bias']:<14} RSI {row['rsi']:>6}  ₹{row['price']}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+import asyncio
+
+import config
+import market
+import metrics
+from cache import TTLCache
+
+# (command, symbol, params) -> (data version, rendered text)
+reply_cache = TTLCache(config.REPLY_CACHE_SIZE)
+
+
+# ===============================
+# RENDERED REPLIES
+# ===============================
+def _key(command, symbol, params):
+    return command, market.normalize_symbol(symbol), params
+
+
+def lookup(command, symbol, params=()):
+    key = _key(command, symbol, params)
+    hit = reply_cache.get(key)
+
+    # a reply is only served while no newer data has arrived for the symbol
+    if hit is not None and hit[0] == market.data_version(key[1]):
+        return hit[1]
+    return None
+
+
+async def cached(command, symbol, params, render):
+    text = lookup(command, symbol, params)
+    if text is not None:
+        metrics.inc("reply_cache_total", command=command, result="hit")
+        return text
+
+    metrics.inc("reply_cache_total", command=command, result="miss")
+    text = await render()
+
+    # failures are not cached; the version is read after rendering because
+    # the render itself may have pulled in fresh data
+    if text is not None:
+        key = _key(command, symbol, params)
+        reply_cache.set(key, (market.data_version(key[1]), text), market.cache_ttl())
+    return text
+
+
+async def prewarm(symbols, renderers, params=()):
+    # fill the cache for hot commands so user requests answer from memory
+    limit = asyncio.Semaphore(config.SCAN_CONCURRENCY)
+
+    async def warm(command, symbol):
+        async with limit:
+            try:
+                await cached(command, symbol, params, lambda: renderers[command](symbol))
+            except Exception as e:
+                print("Prewarm error:", command, symbol, e)
+
+    await asyncio.gather(*[warm(c, s) for s in symbols for c in renderers])
+
+
+metrics.gauge("reply_cache_entries", lambda: len(reply_cache))
@@ -0,0 +1,232 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+import lazy
+from market import normalize_symbol
+
+np = lazy.module("numpy")
+
+# last completed scan, kept for reporting
+last_report = None
+
+# worker processes for full-universe scans, started on first use
+_pool = None
+
+
+# ===============================
+# SYMBOL UNIVERSE
+# ===============================
+def unique_symbols(symbols):
+    seen = set()
+    unique = []
+
+    for symbol in symbols:
+        key = normalize_symbol(symbol)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(symbol.upper())
+
+    return unique
+
+
+def load_universe(path=None):
+    # one symbol per line; falls back to the watchlist when there is no file
+    path = path or config.UNIVERSE_FILE
+    if not path or not os.path.exists(path):
+        return unique_symbols(config.WATCHLIST)
+
+    with open(path) as f:
+        symbols = [line.split("#")[0].strip() for line in f]
+    return unique_symbols([s for s in symbols if s])
+
+
+# ===============================
+# CONCURRENT SCAN
+# ===============================
+async def scan(symbols, evaluate, concurrency=None):
+    global last_report
+
+    symbols = unique_symbols(symbols)
+    limit = asyncio.Semaphore(concurrency or config.SCAN_CONCURRENCY)
+
+    results = {}
+    errors = {}
+    latency = {}
+
+    async def run(symbol):
+        async with limit:
+            started = time.perf_counter()
+            try:
+                result = await evaluate(symbol)
+                if result is not None:
+                    results[symbol] = result
+            except Exception as e:
+                print("Scan error:", symbol, e)
+                errors[symbol] = str(e)
+            finally:
+                latency[symbol] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*[run(symbol) for symbol in symbols])
+    wall_time = time.perf_counter() - started
+
+    # keep results in universe order
+    report = {
+        "symbols": len(symbols),
+        "results": {s: results[s] for s in symbols if s in results},
+        "errors": errors,
+        "latency": latency,
+        "wall_time": wall_time,
+        "finished_at": time.time(),
+    }
+
+    last_report = report
+    print(format_report(report))
+    return report
+
+
+def format_report(report):
+    timings = sorted(report["latency"].values())
+    if not timings:
+        return "Scan: no symbols"
+
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    slowest = max(report["latency"], key=report["latency"].get)
+
+    return (
+        f"Scan: {report['symbols']} symbols in {report['wall_time']:.2f}s | "
+        f"hits {len(report['results'])} | errors {len(report['errors'])} | "
+        f"p95 {p95:.2f}s | slowest {slowest} {report['latency'][slowest]:.2f}s"
+    )
+
+
+# ===============================
+# PROCESS POOL (full universe)
+# ===============================
+def shard(symbols, histories, prices=None, shards=1):
+    # compact payloads: one right-aligned float64 matrix per shard, no objects
+    prices = prices or {}
+    size = max(1, -(-len(symbols) // shards))
+    payloads = []
+
+    for start in range(0, len(symbols), size):
+        part = symbols[start:start + size]
+        rows = histories[start:start + size]
+        lengths = np.array([len(r) for r in rows], dtype=np.int32)
+
+        matrix = np.full((len(rows), int(lengths.max(initial=0))), np.nan)
+        for i, row in enumerate(rows):
+            if len(row):
+                matrix[i, matrix.shape[1] - len(row):] = row
+
+        last = [prices.get(s) for s in part]
+        payloads.append((part, matrix, lengths, np.array([np.nan if p is None else p for p in last])))
+
+    return payloads
+
+
+def evaluate_shard(payload):
+    import indicators
+    import strategy
+
+    symbols, matrix, lengths, prices = payload
+    rows = []
+
+    for i, symbol in enumerate(symbols):
+        closes = matrix[i, matrix.shape[1] - lengths[i]:]
+        if not len(closes):
+            continue
+
+        price = float(closes[-1]) if np.isnan(prices[i]) else float(prices[i])
+        snapshot = strategy.AnalysisSnapshot(
+            symbol=symbol,
+            price=price,
+            closes=closes,
+            ema20=indicators.calculate_ema_from_data(closes, 20),
+            ema50=indicators.calculate_ema_from_data(closes, 50),
+            rsi=indicators.calculate_rsi_from_data(closes, 14),
+            volatility=indicators.calculate_volatility(closes),
+            timestamp=0,
+        )
+
+        score = strategy.calculate_trend_score(snapshot)
+        if score is None:
+            continue
+
+        signal = strategy.generate_signal(snapshot)
+        row = {
+            "symbol": symbol,
+            "score": score["score"],
+            "bias": score["bias"],
+            "trend": score["trend"],
+            "rsi": score["rsi"],
+            "price": round(price, 2),
+            "signal": signal["signal"] if signal else None,
+        }
+
+        if signal:
+            row.update(strategy.predict_target(snapshot) or {})
+        rows.append(row)
+
+    return rows
+
+
+def _get_pool(workers):
+    global _pool
+
+    if _pool is None or _pool._max_workers != workers:
+        close_pool()
+        # forkserver keeps the bot's threads and event loop out of the workers
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["scanner", "indicators", "strategy", "kernels"])
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def rank_universe(symbols, histories, prices=None, workers=None):
+    workers = workers or config.SCAN_WORKERS
+
+    # a few shards per worker keeps the pool busy when shards finish unevenly
+    payloads = shard(symbols, histories, prices, workers * config.SCAN_SHARDS_PER_WORKER)
+
+    if workers == 1:
+        parts = [evaluate_shard(p) for p in payloads]
+    else:
+        parts = list(_get_pool(workers).map(evaluate_shard, payloads))
+
+    rows = [row for part in parts for row in part]
+
+    # strongest bullish first, rsi breaks ties, as in ranking.rank_symbols
+    rows.sort(key=lambda r: (r["score"], r["rsi"]), reverse=True)
+    return rows
+
+
+async def scan_universe(symbols, load, prices=None, workers=None):
+    # fetching stays in the event loop, the indicator work goes to the pool
+    report = await scan(symbols, load)
+    loaded = report["results"]
+
+    names = list(loaded)
+    histories = [loaded[s] for s in names]
+
+    started = time.perf_counter()
+    rows = await asyncio.get_running_loop().run_in_executor(
+        None, rank_universe, names, histories, prices, workers
+    )
+    report["rank_time"] = time.perf_counter() - started
+
+    print(f"Universe scan: {len(rows)} ranked in {report['rank_time']:.2f}s")
+    return rows, report
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import config
+import metrics
+import nse_calendar
+
+# name -> AdaptiveJob, one live registration per name
+jobs = {}
+
+
+# ===============================
+# ADAPTIVE JOB
+# ===============================
+class AdaptiveJob:
+
+    def __init__(self, name, callback, interval, fast=None, max_interval=None, edge=None):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.fast = fast or config.POLL_FAST_INTERVAL
+        self.max_interval = max(interval, max_interval or config.POLL_MAX_INTERVAL)
+        self.edge = config.SESSION_EDGE if edge is None else edge
+        self.current = interval
+        self.next_run = None
+
+    def next_delay(self, now, changed=True):
+        session = nse_calendar.current_session(now)
+
+        # outside a session the job sleeps until the next open
+        if session is None:
+            self.current = self.interval
+            return max(1.0, (nse_calendar.next_open(now) - now).total_seconds())
+
+        opening, closing = session
+
+        # flat prices double the interval, any change resets it
+        if changed:
+            self.current = self.interval
+        else:
+            self.current = min(self.current * 2, self.max_interval)
+
+        delay = self.current
+        to_close = (closing - now).total_seconds()
+        if (now - opening).total_seconds() < self.edge or to_close < self.edge:
+            delay = min(delay, self.fast)
+        else:
+            # don't sleep through the start of the closing window
+            delay = min(delay, max(self.fast, to_close - self.edge))
+
+        # one last run just after the close, then off until the next open
+        return max(1.0, min(delay, to_close + 1))
+
+    async def run(self, context):
+        changed = True
+        try:
+            result = await self.callback(context)
+            if result is not None:
+                changed = bool(result)
+        finally:
+            now = datetime.now(nse_calendar.INDIA)
+            _schedule(context.job_queue, self, self.next_delay(now, changed))
+
+
+# ===============================
+# REGISTRATION
+# ===============================
+def _schedule(job_queue, job, delay):
+    for existing in job_queue.get_jobs_by_name(job.name):
+        existing.schedule_removal()
+
+    job.next_run = datetime.now(nse_calendar.INDIA).timestamp() + delay
+    job_queue.run_once(job.run, delay, name=job.name)
+
+
+def arm(job_queue, name, callback, interval, first=None, **options):
+    # registering a name again replaces the earlier job instead of adding one
+    job = AdaptiveJob(name, callback, interval, **options)
+    jobs[name] = job
+
+    now = datetime.now(nse_calendar.INDIA)
+    delay = job.next_delay(now)
+    if first is not None and nse_calendar.is_open(now):
+        delay = first
+
+    _schedule(job_queue, job, delay)
+    return job
+
+
+def describe():
+    now = datetime.now(nse_calendar.INDIA).timestamp()
+    lines = []
+    for name, job in jobs.items():
+        wait = (job.next_run or now) - now
+        lines.append(f"{name}: every {job.current:.0f}s, next in {wait:.0f}s")
+    return "\n".join(lines)
+
+
+metrics.gauge("scheduler_interval_seconds", lambda: {(("job", n),): j.current for n, j in jobs.items()})
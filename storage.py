@@ -0,0 +1,201 @@
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import config
+
+
+# ===============================
+# SCHEMA MIGRATIONS
+# ===============================
+# (version, statements) applied in order, tracked by PRAGMA user_version
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER,
+            symbol TEXT,
+            target_price REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_alerts_symbol ON alerts (symbol)",
+        "CREATE INDEX IF NOT EXISTS idx_alerts_chat_id ON alerts (chat_id)",
+    ]),
+    (2, [
+        """
+        CREATE TABLE IF NOT EXISTS watchlists (
+            chat_id INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            PRIMARY KEY (chat_id, symbol)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_watchlists_symbol ON watchlists (symbol)",
+    ]),
+    (3, [
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """,
+    ]),
+]
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for target, statements in MIGRATIONS:
+        if target <= version:
+            continue
+
+        with conn:
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {target}")
+
+        print("DB migrated to version", target)
+        version = target
+
+    return version
+
+
+# ===============================
+# STORAGE (single writer thread)
+# ===============================
+class Storage:
+
+    # every statement runs on one background thread with its own
+    # connection, so the event loop never waits on disk
+
+    def __init__(self, path=None):
+        self.path = path or config.DB_PATH
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def open(self):
+        if self._thread is not None:
+            return
+
+        ready = Future()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="sqlite-writer", daemon=True)
+        self._thread.start()
+        ready.result()
+
+    def close(self):
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, ready):
+        try:
+            conn = connect(self.path)
+            migrate(conn)
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(True)
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            fn, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            # the future resolves only once the transaction has committed,
+            # so a caller never acts on a row that may still roll back
+            try:
+                with conn:
+                    result = fn(conn)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        conn.close()
+
+    async def data_version(self):
+        # changes only when another connection (another replica) commits
+        return await self.run(lambda conn: conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def submit(self, fn):
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    async def run(self, fn):
+        return await asyncio.wrap_future(self.submit(fn))
+
+    # ---------- alerts ----------
+
+    async def load_alerts(self, after_id=0):
+        return await self.run(lambda conn: conn.execute(
+            "SELECT id, chat_id, symbol, target_price FROM alerts WHERE id > ? ORDER BY symbol, target_price, id",
+            (after_id,),
+        ).fetchall())
+
+    async def add_alert(self, chat_id, symbol, target_price):
+        return await self.run(lambda conn: conn.execute(
+            "INSERT INTO alerts (chat_id, symbol, target_price) VALUES (?, ?, ?)",
+            (chat_id, symbol, target_price),
+        ).lastrowid)
+
+    async def delete_alerts(self, alert_ids):
+        if not alert_ids:
+            return 0
+
+        return await self.run(lambda conn: conn.executemany(
+            "DELETE FROM alerts WHERE id = ?",
+            [(i,) for i in alert_ids],
+        ).rowcount)
+
+    # ---------- watchlists ----------
+
+    async def load_watchlists(self):
+        return await self.run(lambda conn: conn.execute(
+            "SELECT chat_id, symbol FROM watchlists ORDER BY chat_id, symbol"
+        ).fetchall())
+
+    async def add_watch(self, chat_id, symbols):
+        return await self.run(lambda conn: conn.executemany(
+            "INSERT OR IGNORE INTO watchlists (chat_id, symbol) VALUES (?, ?)",
+            [(chat_id, s) for s in symbols],
+        ).rowcount)
+
+    async def seed_watch(self, chat_id, symbols):
+        # the default watchlist becomes ordinary rows once, so a later
+        # /unwatch of a default symbol survives restarts
+        def seed(conn):
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'watchlist_seeded'").fetchone():
+                return 0
+            added = conn.executemany(
+                "INSERT OR IGNORE INTO watchlists (chat_id, symbol) VALUES (?, ?)",
+                [(chat_id, s) for s in symbols],
+            ).rowcount
+            conn.execute("INSERT INTO meta (key, value) VALUES ('watchlist_seeded', ?)", (str(chat_id),))
+            return added
+
+        return await self.run(seed)
+
+    async def remove_watch(self, chat_id, symbols):
+        return await self.run(lambda conn: conn.executemany(
+            "DELETE FROM watchlists WHERE chat_id = ? AND symbol = ?",
+            [(chat_id, s) for s in symbols],
+        ).rowcount)
@@ -1,11 +1,10 @@
 import time
+from dataclasses import dataclass
 
-from market import get_price, get_candles, is_market_open
-from indicators import (
-    calculate_ema_from_data,
-    calculate_rsi_from_data,
-    calculate_targets,
-)
+import market
+import streaming
+from market import is_market_open
+from indicators import calculate_ema_from_data, calculate_targets
 
 # ===============================
 # Signal tracking (anti spam)
@@ -16,59 +15,157 @@ last_signal_time = {}
 SIGNAL_COOLDOWN = 600   # 10 min
 
 
+# ===============================
+# ANALYSIS SNAPSHOT
+# ===============================
+@dataclass(frozen=True)
+class AnalysisSnapshot:
+    symbol: str
+    price: float
+    closes: list
+    ema20: float
+    ema50: float
+    rsi: float
+    volatility: float
+    timestamp: float
+    timeframe: str = "1d"
+
+
+# memoized per symbol until the underlying chart changes
+_snapshots = {}
+
+
+def _chart_time(result):
+    meta = result.get("meta") or {}
+    if meta.get("regularMarketTime"):
+        return meta["regularMarketTime"]
+
+    timestamps = result.get("timestamp") or []
+    return timestamps[-1] if timestamps else time.time()
+
+
+def snapshot_from_chart(symbol, result, price=None, timeframe="1d"):
+    if not result:
+        return None
+
+    timestamps, closes = market.extract_series(result)
+    if not closes:
+        return None
+
+    price = price if price is not None else closes[-1]
+    timestamp = _chart_time(result)
+
+    key = (market.normalize_symbol(symbol), timeframe)
+    fingerprint = (timestamp, len(closes), closes[-1], price)
+
+    cached = _snapshots.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    # incremental state only pays for bars it has not seen yet
+    values = streaming.get_book(*key).sync(timestamps, closes)
+
+    snapshot = AnalysisSnapshot(
+        symbol=symbol.upper(),
+        price=price,
+        closes=closes,
+        # same kernel over the same closes as /ema and /scan, so the
+        # snapshot never drifts with uptime or an old warm-state book
+        ema20=calculate_ema_from_data(closes, 20),
+        ema50=calculate_ema_from_data(closes, 50),
+        rsi=values["rsi"],
+        volatility=values["volatility"],
+        timestamp=timestamp,
+        timeframe=timeframe,
+    )
+
+    _snapshots[key] = (fingerprint, snapshot)
+    return snapshot
+
+
+def build_snapshot(symbol, price=None, timeframe="1d"):
+    try:
+        chart = market.get_chart(symbol, market.history_range(timeframe), timeframe)
+        return snapshot_from_chart(symbol, chart, price, timeframe)
+    except Exception as e:
+        print("Snapshot error:", e)
+        return None
+
+
+async def build_snapshot_async(symbol, price=None, timeframe="1d"):
+    try:
+        chart = await market.get_chart_async(symbol, market.history_range(timeframe), timeframe)
+        return snapshot_from_chart(symbol, chart, price, timeframe)
+    except Exception as e:
+        print("Snapshot error:", e)
+        return None
+
+
+def _as_snapshot(snapshot):
+    # scripts may still pass a plain symbol
+    if isinstance(snapshot, str):
+        return build_snapshot(snapshot)
+    return snapshot
+
+
 # ===============================
 # TREND IDENTIFIER
 # ===============================
-def identify_trend(symbol):
+def identify_trend(snapshot):
 
     try:
-        closes = get_candles(symbol)
+        snapshot = _as_snapshot(snapshot)
 
-        if not closes:
+        if snapshot is None:
             return None
 
-        ema20 = calculate_ema_from_data(closes, 20)
-        ema50 = calculate_ema_from_data(closes, 50)
-        rsi_value = calculate_rsi_from_data(closes)
-        current_price = get_price(symbol)
+        ema20 = snapshot.ema20
+        ema50 = snapshot.ema50
+        rsi_value = snapshot.rsi
+        current_price = snapshot.price
 
         # safety check
         if None in (ema20, ema50, rsi_value, current_price):
             return None
 
-        # trend logic
-        if ema20 > ema50 and rsi_value > 55:
-            return "Strong Bullish Uptrend 📈🔥"
-
-        elif ema20 < ema50 and rsi_value < 45:
-            return "Strong Bearish Downtrend 📉🔥"
-
-        elif 45 <= rsi_value <= 55:
-            return "Sideways / Low Momentum 🟨"
-
-        else:
-            return "Neutral"
+        return trend_label(ema20, ema50, rsi_value)
 
     except Exception as e:
         print("Trend error:", e)
         return None
 
 
+def trend_label(ema20, ema50, rsi_value):
+
+    # trend logic
+    if ema20 > ema50 and rsi_value > 55:
+        return "Strong Bullish Uptrend 📈🔥"
+
+    elif ema20 < ema50 and rsi_value < 45:
+        return "Strong Bearish Downtrend 📉🔥"
+
+    elif 45 <= rsi_value <= 55:
+        return "Sideways / Low Momentum 🟨"
+
+    else:
+        return "Neutral"
+
+
 # ===============================
 # TREND SCORE (0–100)
 # ===============================
-def calculate_trend_score(symbol):
+def calculate_trend_score(snapshot):
 
     try:
-        closes = get_candles(symbol)
+        snapshot = _as_snapshot(snapshot)
 
-        if closes is None or len(closes) == 0:
+        if snapshot is None:
             return None
 
-        ema20 = calculate_ema_from_data(closes, 20)
-        ema50 = calculate_ema_from_data(closes, 50)
-        rsi = calculate_rsi_from_data(closes)
-        price = get_price(symbol)
+        ema20 = snapshot.ema20
+        ema50 = snapshot.ema50
+        rsi = snapshot.rsi
+        price = snapshot.price
 
         if None in (ema20, ema50, rsi, price):
             return None
@@ -95,16 +192,7 @@ def calculate_trend_score(symbol):
 
         score = max(0, min(100, score))
 
-        if score >= 70:
-            bias = "strong bullish"
-        elif score >= 55:
-            bias = "bullish"
-        elif score <= 30:
-            bias = "strong bearish"
-        elif score <= 45:
-            bias = "bearish"
-        else:
-            bias = "neutral"
+        bias = score_bias(score)
 
         # Momentum logic based on RSI
         if rsi > 65:
@@ -127,7 +215,7 @@ def calculate_trend_score(symbol):
             risk = "low"
 
         return {"score": score, 
-                "trend": identify_trend(symbol),
+                "trend": identify_trend(snapshot),
                 "bias": bias,
                 "momentum": momentum,
                 "risk": risk,
@@ -139,26 +227,40 @@ def calculate_trend_score(symbol):
         return None
 
 
+def score_bias(score):
+
+    if score >= 70:
+        return "strong bullish"
+    elif score >= 55:
+        return "bullish"
+    elif score <= 30:
+        return "strong bearish"
+    elif score <= 45:
+        return "bearish"
+    else:
+        return "neutral"
+
+
 # ===============================
 # AUTO SIGNAL GENERATOR
 # ===============================
-def generate_signal(symbol):
+def generate_signal(snapshot):
 
     try:
-        closes = get_candles(symbol)
+        snapshot = _as_snapshot(snapshot)
 
-        if not closes:
+        if snapshot is None:
             return None
 
-        ema20 = calculate_ema_from_data(closes, 20)
-        ema50 = calculate_ema_from_data(closes, 50)
-        rsi = calculate_rsi_from_data(closes)
-        price = get_price(symbol)
+        ema20 = snapshot.ema20
+        ema50 = snapshot.ema50
+        rsi = snapshot.rsi
+        price = snapshot.price
 
         if None in (ema20, ema50, rsi, price):
             return None
 
-        score = calculate_trend_score(symbol)
+        score = calculate_trend_score(snapshot)
 
         if score is None:
             return None
@@ -180,7 +282,10 @@ def generate_signal(symbol):
             return None
 
         return {
+            "symbol": snapshot.symbol,
+            "timeframe": snapshot.timeframe,
             "signal": signal,
+            "trend": score["trend"],
             "bias": bias,
             "price": round(price, 2),
             "score": score,
@@ -195,18 +300,24 @@ def generate_signal(symbol):
 # ===============================
 # AUTO SIGNAL ENGINE
 # ===============================
-def generate_auto_signal(symbol):
+def generate_auto_signal(snapshot):
 
     if not is_market_open():
         return None
 
     now = time.time()
 
-    result = generate_signal(symbol)
+    snapshot = _as_snapshot(snapshot)
+    result = generate_signal(snapshot)
 
     if not result:
         return None
 
+    # each timeframe keeps its own cooldown
+    symbol = snapshot.symbol
+    if snapshot.timeframe != "1d":
+        symbol = f"{symbol}:{snapshot.timeframe}"
+
     # anti spam logic
     last = last_signal.get(symbol)
     last_time = last_signal_time.get(symbol, 0)
@@ -222,21 +333,21 @@ def generate_auto_signal(symbol):
 # ===============================
 # TARGET PREDICTOR
 # ===============================
-def predict_target(symbol):
+def predict_target(snapshot):
 
     try:
-        closes = get_candles(symbol)
+        snapshot = _as_snapshot(snapshot)
 
-        if not closes:
+        if snapshot is None:
             return None
 
-        trend = identify_trend(symbol)
-        price = get_price(symbol)
+        trend = identify_trend(snapshot)
+        price = snapshot.price
 
         if trend is None or price is None:
             return None
 
-        targets = calculate_targets(closes, trend, price)
+        targets = calculate_targets(snapshot.closes, trend, price, snapshot.volatility)
 
         if not targets:
             return None
@@ -0,0 +1,272 @@
+from bisect import bisect_right
+from collections import deque
+
+
+# ===============================
+# ROLLING WINDOW BASE
+# ===============================
+class _WindowState:
+
+    kind = None
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.prev = None
+        self._since_resync = 0
+
+    def _push(self, item):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(item)
+        self.total += item
+
+        # re-add from scratch once per full window to stop float drift
+        self._since_resync += 1
+        if self._since_resync >= self.period:
+            self.total = float(sum(self.window))
+            self._since_resync = 0
+
+    def _peek_total(self, item):
+        if len(self.window) + 1 < self.period:
+            return None
+        oldest = self.window[0] if len(self.window) == self.period else 0.0
+        return self.total - oldest + item
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "period": self.period,
+            "window": list(self.window),
+            "prev": self.prev,
+        }
+
+    def load(self, data):
+        self.window = deque(data["window"], maxlen=self.period)
+        self.total = float(sum(self.window))
+        self.prev = data["prev"]
+        self._since_resync = 0
+
+
+# ===============================
+# SMA
+# ===============================
+class SMAState(_WindowState):
+
+    kind = "sma"
+
+    def update(self, close):
+        self._push(close)
+        self.prev = close
+
+    def peek(self, close):
+        total = self._peek_total(close)
+        if total is None:
+            return None
+        return round(float(total / self.period), 2)
+
+    def current(self):
+        if len(self.window) < self.period:
+            return None
+        return round(float(self.total / self.period), 2)
+
+
+# ===============================
+# VOLATILITY (avg absolute move)
+# ===============================
+class VolatilityState(_WindowState):
+
+    kind = "volatility"
+
+    def update(self, close):
+        if self.prev is not None:
+            self._push(abs(close - self.prev))
+        self.prev = close
+
+    def peek(self, close):
+        if self.prev is None:
+            return None
+        total = self._peek_total(abs(close - self.prev))
+        if total is None:
+            return None
+        return total / self.period
+
+    def current(self):
+        if len(self.window) < self.period:
+            return None
+        return self.total / self.period
+
+
+# ===============================
+# RSI (simple rolling means)
+# ===============================
+class RSIState:
+
+    kind = "rsi"
+
+    def __init__(self, period=14):
+        self.period = period
+        self.gains = _WindowState(period)
+        self.losses = _WindowState(period)
+        self.prev = None
+
+    @staticmethod
+    def _rsi(gain_total, loss_total, period):
+        avg_gain = gain_total / period
+        avg_loss = loss_total / period
+
+        if avg_loss > 0:
+            return round(float(100 - (100 / (1 + avg_gain / avg_loss))), 2)
+        if avg_gain > 0:
+            return 100.0
+        return None
+
+    def update(self, close):
+        if self.prev is not None:
+            delta = close - self.prev
+            self.gains._push(max(delta, 0.0))
+            self.losses._push(max(-delta, 0.0))
+        self.prev = close
+
+    def peek(self, close):
+        if self.prev is None:
+            return None
+
+        delta = close - self.prev
+        gain_total = self.gains._peek_total(max(delta, 0.0))
+        loss_total = self.losses._peek_total(max(-delta, 0.0))
+
+        if gain_total is None:
+            return None
+        return self._rsi(gain_total, loss_total, self.period)
+
+    def current(self):
+        if len(self.gains.window) < self.period:
+            return None
+        return self._rsi(self.gains.total, self.losses.total, self.period)
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "period": self.period,
+            "gains": list(self.gains.window),
+            "losses": list(self.losses.window),
+            "prev": self.prev,
+        }
+
+    def load(self, data):
+        self.gains.load({"window": data["gains"], "prev": None})
+        self.losses.load({"window": data["losses"], "prev": None})
+        self.prev = data["prev"]
+
+
+STATE_TYPES = {
+    "sma": SMAState,
+    "rsi": RSIState,
+    "volatility": VolatilityState,
+}
+
+
+def state_from_dict(data):
+    state = STATE_TYPES[data["kind"]](data["period"])
+    state.load(data)
+    return state
+
+
+# ===============================
+# PER-SYMBOL INDICATOR SET
+# ===============================
+class IndicatorSet:
+
+    def __init__(self):
+        # only window-based indicators: their value depends on the last N bars
+        # alone, so incremental and batch agree. an EMA depends on where the
+        # series starts, so snapshots compute it over the fetched closes
+        self.states = {
+            "rsi": RSIState(14),
+            "volatility": VolatilityState(14),
+        }
+        self.last_time = None
+
+    def _commit(self, closes):
+        states = self.states.values()
+        for close in closes:
+            for state in states:
+                state.update(close)
+
+    def warm_up(self, timestamps, closes):
+        self.__init__()
+        self._commit(closes)
+        self.last_time = timestamps[-1] if timestamps else None
+
+    def sync(self, timestamps, closes):
+        # everything but the last bar is final, the last one is still live
+        if not closes:
+            return None
+
+        done_times, done_closes = timestamps[:-1], closes[:-1]
+
+        if self.last_time is None or not done_times or done_times[0] > self.last_time:
+            # first sight of this series, or a gap we cannot bridge
+            self.warm_up(done_times, done_closes)
+        else:
+            start = bisect_right(done_times, self.last_time)
+            self._commit(done_closes[start:])
+            if start < len(done_times):
+                self.last_time = done_times[-1]
+
+        live = closes[-1]
+        return {name: state.peek(live) for name, state in self.states.items()}
+
+    def to_dict(self):
+        return {
+            "last_time": self.last_time,
+            "states": {name: state.to_dict() for name, state in self.states.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        book = cls()
+        book.last_time = data["last_time"]
+        # states this version no longer keeps (older snapshots) are skipped
+        book.states.update({
+            name: state_from_dict(s) for name, s in data["states"].items() if name in book.states
+        })
+        return book
+
+
+# keyed by (normalized symbol, interval)
+books = {}
+
+# restored books, only rebuilt when a symbol is first asked for
+_pending = {}
+
+
+def get_book(symbol, interval="1d"):
+    key = (symbol, interval)
+    if key not in books:
+        saved = _pending.pop(key, None)
+        books[key] = IndicatorSet.from_dict(saved) if saved else IndicatorSet()
+    return books[key]
+
+
+def dump_books():
+    items = [
+        {"symbol": symbol, "interval": interval, "book": book}
+        for (symbol, interval), book in _pending.items()
+    ]
+    return items + [
+        {"symbol": symbol, "interval": interval, "book": book.to_dict()}
+        for (symbol, interval), book in books.items()
+    ]
+
+
+def load_books(items, lazy=False):
+    for item in items:
+        key = (item["symbol"], item["interval"])
+        if lazy:
+            _pending[key] = item["book"]
+            books.pop(key, None)
+        else:
+            books[key] = IndicatorSet.from_dict(item["book"])
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import deque
+
+import config
+import market
+import metrics
+
+
+# ===============================
+# SUBSCRIPTION (drop-oldest queue)
+# ===============================
+class Subscription:
+
+    def __init__(self, name, kinds, symbols=None, maxsize=None):
+        self.name = name
+        self.kinds = set(kinds)
+        self.symbols = symbols
+        self.queue = deque(maxlen=maxsize or config.BUS_QUEUE_SIZE)
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def put(self, event):
+        # a slow consumer loses its oldest events, never stalls the poller
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+            metrics.inc("bus_dropped_total", consumer=self.name)
+
+        self.queue.append(event)
+        self._ready.set()
+
+    async def get(self):
+        while not self.queue:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+
+# ===============================
+# BUS
+# ===============================
+class TickBus:
+
+    def __init__(self):
+        self.subscriptions = {}
+        self._tasks = []
+        self._bar = None
+        self.last_prices = {}
+        self.changed = True
+
+    def subscribe(self, name, kinds=("tick",), symbols=None, maxsize=None):
+        sub = Subscription(name, kinds, symbols, maxsize)
+        self.subscriptions[name] = sub
+        return sub
+
+    def publish(self, kind, **payload):
+        event = {"kind": kind, "time": time.time(), **payload}
+
+        for sub in list(self.subscriptions.values()):
+            if kind in sub.kinds:
+                sub.put(event)
+
+        metrics.inc("bus_events_total", kind=kind)
+        return event
+
+    def wanted_symbols(self):
+        # union of every consumer's interest; get_prices dedupes upstream
+        # by normalized symbol and answers under each spelling asked for
+        symbols = {}
+        for sub in self.subscriptions.values():
+            if sub.symbols:
+                symbols.update(dict.fromkeys(sub.symbols()))
+        return list(symbols)
+
+    # ===============================
+    # POLLER
+    # ===============================
+    async def poll(self, now=None):
+        now = now or time.time()
+        symbols = self.wanted_symbols()
+
+        # one batched fetch per cycle, shared by every consumer
+        prices = await market.get_prices_async(symbols) if symbols else {}
+        self.changed = prices != self.last_prices
+        self.last_prices = prices
+        self.publish("tick", prices=prices)
+
+        # a new signal bar starts every SIGNAL_SCAN_INTERVAL seconds
+        bar = int(now // config.SIGNAL_SCAN_INTERVAL)
+        if bar != self._bar:
+            self._bar = bar
+            self.publish("bar", prices=prices, bar_time=bar * config.SIGNAL_SCAN_INTERVAL)
+
+        return prices
+
+    # ===============================
+    # CONSUMERS
+    # ===============================
+    def consume(self, sub, handler):
+
+        async def run():
+            while True:
+                event = await sub.get()
+                started = time.perf_counter()
+                try:
+                    await handler(event)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print("Consumer error:", sub.name, e)
+                    metrics.inc("bus_consumer_errors_total", consumer=sub.name)
+                finally:
+                    metrics.observe("bus_consumer_seconds", time.perf_counter() - started, consumer=sub.name)
+
+        task = asyncio.create_task(run())
+        self._tasks.append(task)
+        return task
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+bus = TickBus()
+
+metrics.gauge("bus_queue_depth", lambda: {(("consumer", s.name),): len(s) for s in bus.subscriptions.values()})
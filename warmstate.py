@@ -0,0 +1,113 @@
+import gzip
+import json
+import os
+import time
+
+import config
+import lazy
+import market
+import metrics
+import strategy
+import streaming
+
+# numpy stays out of the startup path unless there is freshness to restore
+candle_store = lazy.module("candle_store")
+
+FORMAT = 1
+
+
+# ===============================
+# CAPTURE / RESTORE
+# ===============================
+def capture():
+    # runs on the event loop, so the dicts are copied before another
+    # coroutine can change them; the file write happens off the loop
+    return {
+        "format": FORMAT,
+        "saved_at": time.time(),
+        "signals": {
+            "last_signal": dict(strategy.last_signal),
+            "last_signal_time": dict(strategy.last_signal_time),
+        },
+        "books": streaming.dump_books(),
+        "fresh": [[s, i, until] for (s, i), until in list(candle_store._fresh_until.items())],
+        # daily quotes only; longer charts come back from the on-disk candle store
+        "quotes": [
+            [list(key), value, expires_at]
+            for key, value, expires_at in market.candle_cache.entries()
+            if key[1] == "1d"
+        ],
+    }
+
+
+def restore(state):
+    strategy.last_signal.update(state["signals"]["last_signal"])
+    strategy.last_signal_time.update(state["signals"]["last_signal_time"])
+
+    # indicator books are rebuilt per symbol on first use
+    streaming.load_books(state["books"], lazy=True)
+
+    now = time.time()
+    fresh = [(s, i, until) for s, i, until in state["fresh"] if until > now]
+    for symbol, interval, until in fresh:
+        candle_store._fresh_until[(symbol, interval)] = until
+
+    quotes = market.candle_cache.restore((tuple(k), v, exp) for k, v, exp in state["quotes"])
+
+    return {
+        "signals": len(state["signals"]["last_signal_time"]),
+        "books": len(state["books"]),
+        "quotes": quotes,
+        "age": now - state["saved_at"],
+    }
+
+
+# ===============================
+# FILE (atomic, crash safe)
+# ===============================
+def write(state, path=None):
+    path = path or config.STATE_PATH
+    tmp = path + ".tmp"
+
+    started = time.perf_counter()
+    with open(tmp, "wb") as f:
+        with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=1, mtime=0) as gz:
+            gz.write(json.dumps(state, separators=(",", ":")).encode())
+        f.flush()
+        os.fsync(f.fileno())
+
+    # readers see the old snapshot or the new one, never a partial file
+    os.replace(tmp, path)
+    metrics.observe("state_snapshot_seconds", time.perf_counter() - started)
+    return os.path.getsize(path)
+
+
+def read(path=None):
+    path = path or config.STATE_PATH
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with gzip.open(path, "rb") as f:
+            state = json.loads(f.read())
+    except Exception as e:
+        print("State snapshot unreadable, starting cold:", e)
+        return None
+
+    if state.get("format") != FORMAT:
+        print("State snapshot format changed, starting cold")
+        return None
+    return state
+
+
+def load(path=None):
+    state = read(path)
+    if state is None:
+        return None
+
+    summary = restore(state)
+    print(
+        f"Warm start: {summary['signals']} cooldowns, {summary['books']} indicator books, "
+        f"{summary['quotes']} quotes from a {summary['age']:.0f}s old snapshot"
+    )
+    return summary
@@ -0,0 +1,73 @@
+from market import normalize_symbol
+
+
+def display_symbol(symbol):
+    # "sbin.ns" -> "SBIN", the form users type and the bot prints
+    return normalize_symbol(symbol)[:-3]
+
+
+# ===============================
+# IN-MEMORY WATCHLIST INDEX
+# ===============================
+class WatchIndex:
+
+    # chat -> symbols for the commands, symbol -> chats for the fan-out,
+    # so a cycle costs one evaluation per distinct symbol. the default
+    # watchlist is stored as the signal chat's own rows, like any other
+
+    def __init__(self):
+        self._by_chat = {}
+        self._by_symbol = {}
+
+    def load(self, rows):
+        self._by_chat.clear()
+        self._by_symbol.clear()
+
+        count = 0
+        for chat_id, symbol in rows:
+            count += len(self.add(chat_id, [symbol]))
+        return count
+
+    def add(self, chat_id, symbols):
+        added = []
+        watched = self._by_chat.setdefault(chat_id, set())
+
+        for symbol in map(display_symbol, symbols):
+            if symbol in watched:
+                continue
+            watched.add(symbol)
+            self._by_symbol.setdefault(symbol, set()).add(chat_id)
+            added.append(symbol)
+
+        return added
+
+    def remove(self, chat_id, symbols):
+        removed = []
+        watched = self._by_chat.get(chat_id, set())
+
+        for symbol in map(display_symbol, symbols):
+            if symbol not in watched:
+                continue
+            watched.discard(symbol)
+            chats = self._by_symbol[symbol]
+            chats.discard(chat_id)
+            if not chats:
+                del self._by_symbol[symbol]
+            removed.append(symbol)
+
+        if not watched:
+            self._by_chat.pop(chat_id, None)
+        return removed
+
+    def of(self, chat_id):
+        return sorted(self._by_chat.get(chat_id, ()))
+
+    def symbols(self):
+        # union across chats
+        return list(self._by_symbol)
+
+    def subscribers(self, symbol):
+        return set(self._by_symbol.get(display_symbol(symbol), ()))
+
+    def __len__(self):
+        return sum(len(s) for s in self._by_chat.values())